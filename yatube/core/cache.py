@@ -0,0 +1,275 @@
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.memcached import PyLibMCCache
+
+from .constants import (CACHE_CULL_EVERY, CACHE_FAMILY_PARTS,
+                        CACHE_SQLITE_BUSY_TIMEOUT, CACHE_SQLITE_CHUNK)
+
+_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+_missing = object()
+
+FAMILY_SEPARATORS = re.compile(r'[:.|]+')
+
+
+def key_family(key):
+    """
+    Семейство ключа: первые части до разделителей.
+    posts:card:1:... - posts:card, template.cache.index_page.… -
+    template:cache, sorl-thumbnail||image||… - sorl-thumbnail:image.
+    """
+    parts = [part for part in FAMILY_SEPARATORS.split(str(key)) if part]
+    return ':'.join(parts[:CACHE_FAMILY_PARTS])
+
+
+def count(key, hit):
+    with _lock:
+        (_hits if hit else _misses)[key_family(key)] += 1
+
+
+def cache_stats():
+    """Попадания и промахи процесса по семействам ключей."""
+    with _lock:
+        return {
+            family: (_hits[family], _misses[family])
+            for family in set(_hits) | set(_misses)
+        }
+
+
+def reset_cache_stats():
+    with _lock:
+        _hits.clear()
+        _misses.clear()
+
+
+class CacheStatsMixin:
+    """Считает попадания и промахи get и get_many по семействам ключей."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        count(key, value is not _missing)
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        for key in keys:
+            count(key, key in found)
+        return found
+
+
+class SQLiteFileCache(BaseCache):
+    """
+    Кэш в файле SQLite. Один файл делят все процессы машины, поэтому
+    воркеры не прогревают каждый свою копию, как с LocMemCache.
+    Соединение у каждого потока своё и живёт между запросами;
+    get_many - один запрос, add атомарен (INSERT ... ON CONFLICT).
+    Подходит как замена memcached в разработке и тестах.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._location = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._location,
+                timeout=CACHE_SQLITE_BUSY_TIMEOUT,
+                isolation_level=None,
+                uri=self._location.startswith('file:'),
+            )
+            if 'mode=memory' not in self._location:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL'
+                ') WITHOUT ROWID'
+            )
+            self._local.connection = connection
+            self._local.writes = 0
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        found = {}
+        now = time.time()
+        made = list(names)
+        for start in range(0, len(made), CACHE_SQLITE_CHUNK):
+            chunk = made[start:start + CACHE_SQLITE_CHUNK]
+            rows = self._connection().execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))
+                ),
+                chunk + [now],
+            )
+            for name, value in rows:
+                found[names[name]] = pickle.loads(value)
+        return found
+
+    def _write(self, sql, rows):
+        connection = self._connection()
+        connection.executemany(sql, rows)
+        self._local.writes += 1
+        if self._local.writes % CACHE_CULL_EVERY == 0:
+            self._cull(connection)
+
+    def _cull(self, connection):
+        """
+        Удаляет просроченные записи, а при превышении MAX_ENTRIES -
+        ещё долю 1/CULL_FREQUENCY записей, которые истекут раньше всех.
+        """
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        total = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (total // self._cull_frequency,),
+            )
+
+    def _row(self, key, value, timeout, version):
+        return (
+            self._key(key, version),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_backend_timeout(timeout),
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            [self._row(key, value, timeout, version)],
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._write(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                [
+                    self._row(key, value, timeout, version)
+                    for key, value in data.items()
+                ],
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Записывает, только если ключа нет или он истёк. Атомарно."""
+        connection = self._connection()
+        cursor = connection.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            self._row(key, value, timeout, version) + (time.time(),),
+        )
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (
+                self.get_backend_timeout(timeout),
+                self._key(key, version),
+                time.time(),
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        """Чтение и запись в одной транзакции, чтобы не терять прибавки."""
+        connection = self._connection()
+        name = self._key(key, version)
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (name, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), name),
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def has_key(self, key, version=None):
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        cursor = self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        self._connection().executemany(
+            'DELETE FROM cache WHERE key = ?',
+            [(self._key(key, version),) for key in keys],
+        )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение потока переживает запрос: открывать файл
+        # и читать схему на каждый запрос дороже самого запроса.
+        pass
+
+
+class SQLiteCache(CacheStatsMixin, SQLiteFileCache):
+    pass
+
+
+class MemcachedCache(CacheStatsMixin, PyLibMCCache):
+    """
+    memcached через pylibmc. Подкласс добавляет только статистику
+    попаданий: close() у PyLibMCCache в Django 2.2 и так ничего
+    не делает, соединения libmemcached живут между запросами.
+    """
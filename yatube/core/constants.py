@@ -0,0 +1,16 @@
+METRICS_SAMPLES = 1000
+METRICS_FLUSH_INTERVAL = 10
+METRICS_CACHE_TIME = 3600
+METRICS_CACHE_KEY = 'core:metrics:{process}'
+METRICS_PROCESSES_KEY = 'core:metrics:processes'
+METRICS_PERCENTILES = (50, 95, 99)
+METRICS_UNRESOLVED = '<unresolved>'
+REPLICA_PIN_COOKIE = 'primary_pin'
+STARTUP_PROFILES = ('dev', 'prod')
+STARTUP_RUNS = 5
+STARTUP_REQUESTS = 200
+CACHE_FAMILY_PARTS = 2
+CACHE_CULL_EVERY = 100
+CACHE_SQLITE_BUSY_TIMEOUT = 5
+CACHE_SQLITE_CHUNK = 500
+METRICS_CACHE_STATS_KEY = 'core:metrics:cache:{process}'
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_write_lock = threading.Lock()
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Настраивает каждое новое соединение SQLite по settings.SQLITE_PRAGMAS.
+    PRAGMA выполняются мимо обёрток курсора Django, чтобы не попадать
+    в метрики и бюджеты запросов первого запроса соединения.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@contextmanager
+def write_lock():
+    """
+    Очередь записи в SQLite: пишущие запросы ждут друг друга на
+    блокировке, а не перезапускают транзакции по busy_timeout.
+    Потоки процесса ждут на threading.Lock, процессы gunicorn -
+    на flock файла рядом с базой. Включается SQLITE_WRITE_QUEUE.
+    """
+    if (
+        not getattr(settings, 'SQLITE_WRITE_QUEUE', False)
+        or connection.vendor != 'sqlite'
+    ):
+        yield
+        return
+    with _write_lock:
+        if fcntl is None or connection.is_in_memory_db():
+            yield
+            return
+        with open(f'{connection.settings_dict["NAME"]}.lock', 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def serialized_writes(view):
+    """Ставит изменяющие запросы представления в очередь записи."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        with write_lock():
+            return view(request, *args, **kwargs)
+    return wrapper
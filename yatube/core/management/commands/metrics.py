@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+
+from core.metrics import cache_summary, reset, summary
+
+COLUMNS = (
+    ('requests', 'запросов', '{}'),
+    ('latency_p50', 'p50 мс', '{:.1f}'),
+    ('latency_p95', 'p95 мс', '{:.1f}'),
+    ('latency_p99', 'p99 мс', '{:.1f}'),
+    ('queries_p50', 'SQL p50', '{}'),
+    ('queries_max', 'SQL max', '{}'),
+    ('query_budget', 'бюджет', '{}'),
+    ('sql_p95', 'SQL p95 мс', '{:.1f}'),
+    ('template_p95', 'шаблоны p95 мс', '{:.1f}'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Перцентили задержки, числа и времени SQL-запросов и времени '
+        'шаблонов по представлениям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Сбросить накопленные замеры.',
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset()
+            self.stdout.write('Замеры сброшены')
+            return
+        rows = summary()
+        if not rows:
+            self.stdout.write('Замеров пока нет')
+            return
+        self.write_views(rows)
+        self.write_cache(cache_summary())
+
+    def write_views(self, rows):
+        width = max(len(view) for view in rows)
+        self.stdout.write('  '.join(
+            ['представление'.ljust(width)]
+            + [title for _, title, _ in COLUMNS]
+        ))
+        for view, row in rows.items():
+            cells = [
+                ('-' if row[key] is None else template.format(row[key]))
+                .rjust(len(title))
+                for key, title, template in COLUMNS
+            ]
+            self.stdout.write('  '.join([view.ljust(width)] + cells))
+
+    def write_cache(self, rows):
+        if not rows:
+            return
+        width = max(len(family) for family in rows)
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"кэш".ljust(width)}  попаданий  промахов  доля'
+        )
+        for family, row in rows.items():
+            self.stdout.write(
+                f'{family.ljust(width)}  {row["hits"]:9}  '
+                f'{row["misses"]:8}  {row["hit_rate"]:4.0%}'
+            )
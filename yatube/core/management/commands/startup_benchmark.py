@@ -0,0 +1,102 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.constants import STARTUP_PROFILES, STARTUP_REQUESTS, STARTUP_RUNS
+
+# Выполняется в чистом процессе: импорт и setup нельзя замерить
+# там, где Django уже загружен. Запрос идёт к странице без базы,
+# поэтому его время - это в основном цепочка middleware и шаблон.
+PROBE = '''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+from yatube.wsgi import application  # noqa
+startup = time.perf_counter() - start
+modules = len(sys.modules)
+
+from django.test import Client
+
+url, count = sys.argv[1], int(sys.argv[2])
+client = Client()
+client.get(url)
+timings = []
+for _ in range(count):
+    begin = time.perf_counter()
+    client.get(url)
+    timings.append(time.perf_counter() - begin)
+timings.sort()
+print(json.dumps({
+    'startup': startup,
+    'modules': modules,
+    'request': timings[len(timings) // 2],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает профили настроек: время загрузки WSGI-приложения, '
+        'число импортированных модулей и медианное время запроса '
+        'к странице без базы данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profiles',
+            nargs='*',
+            default=STARTUP_PROFILES,
+            help='Профили из yatube.settings.',
+        )
+        parser.add_argument('--runs', type=int, default=STARTUP_RUNS)
+        parser.add_argument(
+            '--requests', type=int, default=STARTUP_REQUESTS
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def probe(self, profile, url, requests):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='yatube.settings',
+            YATUBE_ENV=profile,
+        )
+        # prod не запускается без ключа; для замера подойдёт любой.
+        env.setdefault('YATUBE_SECRET_KEY', 'startup-benchmark')
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, url, str(requests)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        return json.loads(output.decode().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        url = reverse('about:author')
+        results = {}
+        for profile in options['profiles']:
+            runs = [
+                self.probe(profile, url, options['requests'])
+                for _ in range(options['runs'])
+            ]
+            results[profile] = {
+                key: statistics.median(run[key] for run in runs)
+                for key in ('startup', 'modules', 'request')
+            }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write('профиль  старт мс  модулей  запрос мкс')
+        for profile, row in results.items():
+            self.stdout.write(
+                f'{profile:<7}  {row["startup"] * 1000:8.0f}  '
+                f'{row["modules"]:7.0f}  {row["request"] * 1000000:10.0f}'
+            )
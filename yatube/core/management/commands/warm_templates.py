@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.templates import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны проекта: проверяет их синтаксис '
+        'и показывает, сколько стоит прогрев при старте.'
+    )
+
+    def handle(self, *args, **options):
+        count, elapsed = warm_templates()
+        self.stdout.write(
+            f'Скомпилировано шаблонов: {count} за {elapsed * 1000:.0f} мс'
+        )
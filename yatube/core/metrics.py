@@ -0,0 +1,217 @@
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import cache_stats, reset_cache_stats
+from .constants import (METRICS_CACHE_KEY, METRICS_CACHE_STATS_KEY,
+                        METRICS_CACHE_TIME, METRICS_FLUSH_INTERVAL,
+                        METRICS_PERCENTILES, METRICS_PROCESSES_KEY,
+                        METRICS_SAMPLES)
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=METRICS_SAMPLES))
+_last_flush = 0.0
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше запросов, чем указано в бюджете."""
+
+
+class RequestMetrics:
+    """
+    Счётчики одного запроса.
+    queries - число SQL-запросов
+    sql_time - суммарное время SQL
+    template_time - время отрисовки шаблонов верхнего уровня.
+    Экземпляр подключается к соединениям через execute_wrapper.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+def start_request():
+    metrics = RequestMetrics()
+    _local.metrics = metrics
+    return metrics
+
+
+def finish_request():
+    _local.metrics = None
+
+
+@contextmanager
+def template_timer():
+    """
+    Замеряет отрисовку шаблона. Вложенные render_to_string
+    не считаются повторно: время идёт только у внешнего шаблона.
+    """
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - start
+
+
+def process_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def record(view_name, latency, metrics):
+    """Сохраняет замер в памяти процесса и раз в интервал сбрасывает в кэш."""
+    with _lock:
+        _samples[view_name].append((
+            latency, metrics.queries, metrics.sql_time, metrics.template_time
+        ))
+    if time.monotonic() - _last_flush > METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def flush():
+    """
+    Публикует замеры процесса в кэше, откуда их читают
+    команда metrics и страница /metrics/ любого процесса.
+    """
+    global _last_flush
+    with _lock:
+        _last_flush = time.monotonic()
+        data = {view: list(samples) for view, samples in _samples.items()}
+    process = process_name()
+    cache.set_many(
+        {
+            METRICS_CACHE_KEY.format(process=process): data,
+            METRICS_CACHE_STATS_KEY.format(process=process): cache_stats(),
+        },
+        METRICS_CACHE_TIME,
+    )
+    processes = cache.get(METRICS_PROCESSES_KEY) or set()
+    if process not in processes:
+        processes.add(process)
+        cache.set(METRICS_PROCESSES_KEY, processes, METRICS_CACHE_TIME)
+
+
+def collect():
+    """Замеры всех процессов по именам представлений."""
+    flush()
+    merged = defaultdict(list)
+    processes = cache.get(METRICS_PROCESSES_KEY) or set()
+    keys = [METRICS_CACHE_KEY.format(process=name) for name in processes]
+    for data in cache.get_many(keys).values():
+        for view, samples in data.items():
+            merged[view].extend(samples)
+    return merged
+
+
+def collect_cache_stats():
+    """Попадания и промахи кэша всех процессов по семействам ключей."""
+    flush()
+    merged = defaultdict(lambda: [0, 0])
+    processes = cache.get(METRICS_PROCESSES_KEY) or set()
+    keys = [METRICS_CACHE_STATS_KEY.format(process=name) for name in processes]
+    for data in cache.get_many(keys).values():
+        for family, (hits, misses) in data.items():
+            merged[family][0] += hits
+            merged[family][1] += misses
+    return merged
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+    reset_cache_stats()
+    processes = cache.get(METRICS_PROCESSES_KEY) or set()
+    cache.delete_many(
+        [METRICS_CACHE_KEY.format(process=name) for name in processes]
+        + [
+            METRICS_CACHE_STATS_KEY.format(process=name)
+            for name in processes
+        ]
+        + [METRICS_PROCESSES_KEY]
+    )
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summary():
+    """
+    Сводка по представлениям: число запросов и перцентили
+    задержки, SQL и шаблонов в миллисекундах.
+    """
+    result = {}
+    for view, samples in sorted(collect().items()):
+        latency, queries, sql_time, template_time = zip(*samples)
+        row = {'requests': len(samples)}
+        for percent in METRICS_PERCENTILES:
+            row[f'latency_p{percent}'] = percentile(latency, percent) * 1000
+        row['queries_p50'] = percentile(queries, 50)
+        row['queries_max'] = max(queries)
+        row['sql_p95'] = percentile(sql_time, 95) * 1000
+        row['template_p95'] = percentile(template_time, 95) * 1000
+        row['query_budget'] = query_budgets().get(view)
+        result[view] = row
+    return result
+
+
+def cache_summary():
+    """Доля попаданий в кэш по семействам ключей."""
+    result = {}
+    for family, (hits, misses) in sorted(collect_cache_stats().items()):
+        result[family] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses),
+        }
+    return result
+
+
+def query_budgets():
+    return getattr(settings, 'QUERY_BUDGETS', {})
+
+
+def check_budget(view_name, queries):
+    """
+    Сравнивает число запросов с бюджетом из settings.QUERY_BUDGETS.
+    При QUERY_BUDGETS_STRICT превышение - ошибка (так падают тесты),
+    иначе только предупреждение в лог.
+    """
+    budget = query_budgets().get(view_name)
+    if budget is None or queries <= budget:
+        return
+    message = f'{view_name}: {queries} SQL-запросов при бюджете {budget}'
+    if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
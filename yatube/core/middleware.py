@@ -0,0 +1,78 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import metrics
+from .constants import METRICS_UNRESOLVED, REPLICA_PIN_COOKIE
+from .routers import WriteDetector, replicas, use_replicas
+
+
+class MetricsMiddleware:
+    """
+    Считает для каждого представления (view_name резолвера) число
+    и время SQL-запросов, время шаблонов и полную задержку ответа.
+    Стоит первым в MIDDLEWARE, чтобы учитывать запросы сессий
+    и аутентификации.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        latency = time.perf_counter() - start
+        match = request.resolver_match
+        view_name = match.view_name if match else METRICS_UNRESOLVED
+        metrics.record(view_name, latency, request_metrics)
+        metrics.check_budget(view_name, request_metrics.queries)
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Отправляет чтения представлений settings.REPLICA_VIEWS на реплики.
+    Если запрос что-то записал в основную базу, пользователь на
+    REPLICA_PIN_TIME секунд получает cookie и читает только основную
+    базу: реплика могла ещё не получить его же изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        detector = WriteDetector()
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(detector):
+                response = self.get_response(request)
+        finally:
+            use_replicas(False)
+        if detector.wrote:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_TIME,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        use_replicas(
+            bool(replicas())
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and REPLICA_PIN_COOKIE not in request.COOKIES
+        )
@@ -0,0 +1,74 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_state = threading.local()
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def use_replicas(enabled):
+    """Включает чтение с реплик для текущего потока."""
+    _state.replica = enabled
+
+
+@contextmanager
+def primary_reads():
+    """
+    Чтения внутри блока идут на основную базу даже в представлении
+    из REPLICA_VIEWS: для кода, которому нужны только что записанные
+    данные.
+    """
+    previous = getattr(_state, 'replica', False)
+    _state.replica = False
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+class WriteDetector:
+    """
+    execute_wrapper основной базы: отмечает, что запрос что-то
+    записал. Смотрит на сам SQL, а не на вызовы db_for_write,
+    который Django спрашивает и для чтений вроде get_or_create.
+    """
+
+    def __init__(self):
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            self.wrote = True
+        return execute(sql, params, many, context)
+
+
+class ReplicaRouter:
+    """
+    Запись - всегда в default. Чтение - на случайную реплику из
+    settings.DATABASE_REPLICAS, но только после use_replicas(True):
+    его вызывает ReplicaMiddleware для представлений REPLICA_VIEWS.
+    """
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if aliases and getattr(_state, 'replica', False):
+            return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        return obj1._state.db in pool and obj2._state.db in pool
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas()
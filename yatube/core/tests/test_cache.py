@@ -0,0 +1,76 @@
+import os
+import tempfile
+import threading
+
+from django.test import TestCase
+
+from ..cache import SQLiteCache, cache_stats, key_family, reset_cache_stats
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.directory.name, 'cache.sqlite3')
+        self.cache = self.backend()
+        reset_cache_stats()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def backend(self, prefix='test'):
+        return SQLiteCache(self.location, {'KEY_PREFIX': prefix})
+
+    def test_shared_between_instances(self):
+        """
+        Второй экземпляр (другой процесс) видит те же данные,
+        а префикс окружения отделяет ключи.
+        """
+        self.cache.set_many({'posts:card:1': 'a', 'posts:card:2': 'b'})
+        other = self.backend()
+        self.assertEqual(
+            other.get_many(['posts:card:1', 'posts:card:2', 'posts:card:3']),
+            {'posts:card:1': 'a', 'posts:card:2': 'b'},
+        )
+        self.assertIsNone(self.backend('prod').get('posts:card:1'))
+
+    def test_expiry_and_add(self):
+        self.cache.set('expired', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('expired'))
+        self.assertTrue(self.cache.add('expired', 2))
+        self.assertFalse(self.cache.add('expired', 3))
+        self.assertEqual(self.cache.get('expired'), 2)
+        self.assertTrue(self.cache.delete('expired'))
+        self.assertFalse(self.cache.has_key('expired'))
+
+    def test_add_is_atomic(self):
+        """Из одновременных add ключ получает ровно один поток."""
+        results = []
+
+        def add():
+            results.append(self.backend().add('lock', 1))
+
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_hit_rate_by_family(self):
+        self.assertEqual(key_family('posts:card:1:2:feed'), 'posts:card')
+        self.assertEqual(
+            key_family('template.cache.index_page.abc'), 'template:cache'
+        )
+        self.cache.set('posts:card:1', 'a')
+        self.cache.get('posts:card:1')
+        self.cache.get_many(['posts:card:1', 'posts:card:2'])
+        self.cache.get('posts:feed:generation')
+        self.assertEqual(
+            cache_stats(), {'posts:card': (2, 1), 'posts:feed': (0, 1)}
+        )
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import threading
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+
+from ..db import write_lock
+
+
+class SQLitePragmaTests(TestCase):
+    def pragma(self, db, name):
+        return db.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        """Новое соединение с файлом базы сразу в WAL и с busy_timeout."""
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseWrapper(
+                dict(
+                    connection.settings_dict,
+                    NAME=os.path.join(directory, 'test.sqlite3'),
+                )
+            )
+            db.ensure_connection()
+            try:
+                self.assertEqual(self.pragma(db, 'journal_mode'), 'wal')
+                self.assertEqual(self.pragma(db, 'synchronous'), 1)
+                self.assertEqual(self.pragma(db, 'busy_timeout'), 20000)
+                self.assertEqual(self.pragma(db, 'temp_store'), 2)
+            finally:
+                db.close()
+
+    @override_settings(SQLITE_WRITE_QUEUE=True)
+    def test_write_queue_serializes_writers(self):
+        entered = threading.Event()
+
+        def writer():
+            with write_lock():
+                entered.set()
+
+        with write_lock():
+            thread = threading.Thread(target=writer)
+            thread.start()
+            self.assertFalse(entered.wait(0.1))
+        thread.join()
+        self.assertTrue(entered.is_set())
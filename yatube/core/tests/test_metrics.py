@@ -0,0 +1,77 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import QueryBudgetExceeded, percentile, reset, summary
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        reset()
+        self.client = Client()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_view_metrics_recorded(self):
+        """Замер попадает в сводку под view_name резолвера."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        row = summary()['posts:index']
+        self.assertEqual(row['requests'], 2)
+        self.assertGreater(row['queries_max'], 0)
+        self.assertGreater(row['template_p95'], 0)
+        self.assertGreaterEqual(row['latency_p99'], row['template_p95'])
+        self.assertEqual(
+            row['query_budget'], settings.QUERY_BUDGETS['posts:index']
+        )
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGETS_STRICT=True
+    )
+    def test_budget_exceeded_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_budget_exceeded_logged(self):
+        with self.assertLogs('core.metrics', 'WARNING'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_endpoint_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+        data = json.loads(response.content)
+        self.assertIn('posts:index', data['views'])
+        self.assertIn('posts:feed', data['cache'])
+
+    def test_command(self):
+        self.client.get(reverse('about:author'))
+        out = StringIO()
+        call_command('metrics', stdout=out)
+        self.assertIn('about:author', out.getvalue())
+        call_command('metrics', reset=True, stdout=StringIO())
+        out = StringIO()
+        call_command('metrics', stdout=out)
+        self.assertIn('Замеров пока нет', out.getvalue())
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.feed_cache import bump_feed_generation
+from posts.models import Comment, Post
+from posts.stats import user_stats
+
+from ..constants import REPLICA_PIN_COOKIE
+from ..routers import ReplicaRouter, primary_reads, use_replicas
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    def tearDown(self):
+        use_replicas(False)
+
+    def test_reads_go_to_replica_only_when_enabled(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        use_replicas(True)
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        with primary_reads():
+            self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_replicas_not_migrated(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+
+# Роль реплики играет сама default: маршрутизацию видно
+# по вызовам выбора реплики, а запросы работают как обычно.
+@override_settings(DATABASE_REPLICAS=['default'])
+@mock.patch(
+    'core.routers.random.choice', side_effect=lambda aliases: 'default'
+)
+class ReplicaMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        user_stats(cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_read_views_use_replica(self, choice):
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(choice.called)
+        choice.reset_mock()
+        self.client.get(reverse('posts:search'), {'q': 'пост'})
+        self.assertFalse(choice.called)
+
+    def test_reads_pinned_after_write(self, choice):
+        """После записи пользователь читает основную базу."""
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        choice.reset_mock()
+        self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertFalse(choice.called)
+
+    def test_read_does_not_pin(self, choice):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_cache_fills_read_primary(self, choice):
+        """
+        Промахи после смены поколения ленты заполняют общий кэш
+        с основной базы: отставшая реплика не попадает в него
+        на всё поколение.
+        """
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        cache.clear()
+        bump_feed_generation()
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Комментарий')
+        self.assertFalse(choice.called)
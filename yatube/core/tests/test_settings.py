@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class ProdSettingsTests(SimpleTestCase):
+    def load_prod(self, **environ):
+        env = {
+            key: value for key, value in os.environ.items()
+            if key != 'YATUBE_SECRET_KEY'
+        }
+        env.update(environ, YATUBE_ENV='prod')
+        return subprocess.run(
+            [sys.executable, '-c', 'import yatube.settings'],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stderr=subprocess.PIPE,
+        )
+
+    def test_secret_key_required(self):
+        """Профиль prod не загружается без YATUBE_SECRET_KEY."""
+        result = self.load_prod()
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(b'YATUBE_SECRET_KEY', result.stderr)
+
+    def test_secret_key_from_environment(self):
+        result = self.load_prod(YATUBE_SECRET_KEY='секрет')
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
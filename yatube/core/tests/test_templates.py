@@ -0,0 +1,39 @@
+import copy
+from unittest import mock
+
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from ..templates import warm_templates
+
+CACHED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+CACHED_TEMPLATES[0]['APP_DIRS'] = False
+CACHED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class TemplateWarmupTests(TestCase):
+    def test_templates_compiled_once(self):
+        """
+        После прогрева шаблоны берутся из памяти процесса:
+        отрисовка страницы не читает файлы шаблонов.
+        """
+        count, _ = warm_templates()
+        self.assertGreater(count, 0)
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+        self.assertIn(
+            'posts/includes/card_post.html', loader.get_template_cache
+        )
+        with mock.patch(
+            'django.template.loaders.filesystem.Loader.get_contents',
+            side_effect=AssertionError,
+        ):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
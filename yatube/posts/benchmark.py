@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from core.metrics import percentile
+
+from .constants import BENCHMARK_PAGES, BENCHMARK_WRITE_SHARE
+from .models import Follow, Group, Post, User
+from .seeding import zipf_weights
+
+
+class Dataset:
+    """
+    Что есть в базе для построения запросов. Популярные авторы,
+    группы и посты выбираются чаще, как в настоящем трафике.
+    """
+
+    def __init__(self):
+        self.usernames = list(
+            User.objects.order_by('-stats__followers_count', 'pk')
+            .values_list('username', flat=True)
+        )
+        self.slugs = list(
+            Group.objects.order_by('-stats__posts_count', 'pk')
+            .values_list('slug', flat=True)
+        )
+        self.post_pks = list(Post.objects.values_list('pk', flat=True))
+        self.readers = list(
+            User.objects.filter(
+                pk__in=Follow.objects.values('user_id')
+            ).order_by('pk')
+        ) or list(User.objects.order_by('pk')[:1])
+        self.weights = {
+            'usernames': zipf_weights(len(self.usernames)),
+            'slugs': zipf_weights(len(self.slugs)),
+        }
+
+    def pick(self, rng, name):
+        return rng.choices(getattr(self, name), self.weights[name])[0]
+
+
+def page(rng):
+    number = rng.randint(1, BENCHMARK_PAGES)
+    return {'page': number} if number > 1 else {}
+
+
+def index(dataset, rng):
+    return 'get', reverse('posts:index'), page(rng), None
+
+
+def group_posts(dataset, rng):
+    slug = dataset.pick(rng, 'slugs')
+    url = reverse('posts:group_posts', kwargs={'slug': slug})
+    return 'get', url, page(rng), None
+
+
+def profile(dataset, rng):
+    username = dataset.pick(rng, 'usernames')
+    url = reverse('posts:profile', kwargs={'username': username})
+    return 'get', url, page(rng), None
+
+
+def post_detail(dataset, rng):
+    url = reverse(
+        'posts:post_detail', kwargs={'post_id': rng.choice(dataset.post_pks)}
+    )
+    return 'get', url, {}, None
+
+
+def follow_index(dataset, rng):
+    reader = rng.choice(dataset.readers)
+    return 'get', reverse('posts:follow_index'), page(rng), reader
+
+
+def add_comment(dataset, rng):
+    url = reverse(
+        'posts:add_comment', kwargs={'post_id': rng.choice(dataset.post_pks)}
+    )
+    reader = rng.choice(dataset.readers)
+    return 'post', url, {'text': 'Комментарий нагрузочного теста'}, reader
+
+
+def read_write(dataset, rng):
+    """Чтение вперемешку с записью, как на живом сайте."""
+    if rng.random() < BENCHMARK_WRITE_SHARE:
+        return add_comment(dataset, rng)
+    return post_detail(dataset, rng)
+
+
+SCENARIOS = {
+    scenario.__name__: scenario
+    for scenario in (
+        index,
+        group_posts,
+        profile,
+        post_detail,
+        follow_index,
+        add_comment,
+        read_write,
+    )
+}
+
+
+class Worker:
+    """
+    Поток нагрузки со своими клиентами: по одному на пользователя,
+    чтобы сессия создавалась один раз, а не на каждый запрос.
+    """
+
+    def __init__(self):
+        self.clients = {}
+
+    def client(self, user):
+        if user not in self.clients:
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            self.clients[user] = client
+        return self.clients[user]
+
+    def run(self, plan):
+        timings = []
+        errors = 0
+        try:
+            for method, url, data, user in plan:
+                client = self.client(user)
+                start = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+        return timings, errors
+
+
+def run_scenario(name, dataset, requests, concurrency, seed=0):
+    """
+    Выполняет requests запросов сценария в concurrency потоков.
+    План запросов строится заранее из seed, поэтому каждая ветка
+    получает одну и ту же последовательность URL.
+    """
+    rng = random.Random(f'{seed}:{name}')
+    plan = [SCENARIOS[name](dataset, rng) for _ in range(requests)]
+    chunks = [plan[start::concurrency] for start in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        results = [Worker().run(plan)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(
+                executor.map(lambda chunk: Worker().run(chunk), chunks)
+            )
+    elapsed = time.perf_counter() - start
+    timings = [timing for result, _ in results for timing in result]
+    return {
+        'requests': len(timings),
+        'errors': sum(errors for _, errors in results),
+        'rps': len(timings) / elapsed,
+        'p50': percentile(timings, 50) * 1000,
+        'p95': percentile(timings, 95) * 1000,
+        'p99': percentile(timings, 99) * 1000,
+    }
@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.routers import primary_reads
+
+from .comment_cache import latest_comments
+from .constants import CARD_CACHE_KEY, CARD_CACHE_TIME
+from .models import Post
+from .utils import feed_posts
+
+CARD_TEMPLATE = 'posts/includes/card_post.html'
+NO_COMMENTS = {'count': 0, 'comments': []}
+
+
+def card_version(post, latest=None):
+    """
+    Версия карточки: updated_at поста, число комментариев и id
+    последнего из них. Новый или удалённый комментарий даёт новую
+    карточку без правки поста и без смены поколения ленты.
+    """
+    latest = latest or NO_COMMENTS
+    newest = latest['comments'][0]['id'] if latest['comments'] else 0
+    updated_at = int(post.updated_at.timestamp() * 1000000)
+    return f'{updated_at}.{latest["count"]}.{newest}'
+
+
+def card_key(post, variant, latest=None):
+    """Ключ карточки: id поста, версия и вариант вёрстки."""
+    return CARD_CACHE_KEY.format(
+        pk=post.pk, version=card_version(post, latest), variant=variant
+    )
+
+
+def card_variant(request):
+    """На странице группы карточка выводится без ссылки на группу."""
+    view_name = getattr(
+        getattr(request, 'resolver_match', None), 'view_name', ''
+    )
+    return 'group' if view_name == 'posts:group_posts' else 'feed'
+
+
+def render_cards(request, posts, latest=None):
+    """
+    Отрисованные карточки постов страницы. posts - объекты Post
+    или записи кэшированной страницы (pk и updated_at). Все
+    карточки достаются из кэша одним get_many; посты для промахов,
+    если их нет под рукой, читаются одним запросом к основной базе:
+    карточка попадает в общий кэш.
+    """
+    variant = card_variant(request)
+    posts = list(posts)
+    if latest is None:
+        latest = latest_comments(posts)
+    keys = {
+        post.pk: card_key(post, variant, latest.get(post.pk))
+        for post in posts
+    }
+    cards = cache.get_many(list(keys.values()))
+    loaded = {post.pk: post for post in posts if isinstance(post, Post)}
+    missing = [
+        post.pk for post in posts
+        if keys[post.pk] not in cards and post.pk not in loaded
+    ]
+    if missing:
+        with primary_reads():
+            loaded.update(feed_posts(Post.objects.all()).in_bulk(missing))
+    missed = {}
+    for post in posts:
+        key = keys[post.pk]
+        if key in cards or post.pk not in loaded:
+            continue
+        post = loaded[post.pk]
+        snapshot = latest.get(post.pk) or NO_COMMENTS
+        cards[key] = render_to_string(
+            CARD_TEMPLATE,
+            {
+                'post': post,
+                'comment_count': snapshot['count'],
+                'latest_comments': snapshot['comments'],
+                'request': request,
+            },
+        )
+        # Карточку с оригиналом вместо миниатюры не кэшируем.
+        if not getattr(post, 'thumbnail_pending', False):
+            missed[key] = cards[key]
+    if missed:
+        cache.set_many(missed, CARD_CACHE_TIME)
+    # Пост, удалённый после расчёта страницы, просто пропускается.
+    return [
+        mark_safe(cards[keys[post.pk]]) for post in posts
+        if keys[post.pk] in cards
+    ]
+
+
+def page_version(posts, latest):
+    """Версии карточек страницы для ETag: без их отрисовки."""
+    return ','.join(
+        f'{post.pk}:{card_version(post, latest.get(post.pk))}'
+        for post in posts
+    )
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.utils.text import Truncator
+
+from core.routers import primary_reads
+
+from .constants import (LATEST_COMMENTS, LATEST_COMMENTS_KEY,
+                        LATEST_COMMENTS_LENGTH, LATEST_COMMENTS_TIME)
+from .models import Comment, Post, User
+
+# Счётчики и последние комментарии нескольких постов одним запросом:
+# каждая ветка UNION ALL читает строку поста и не больше
+# LATEST_COMMENTS строк индекса (post, -created, -id). Пост без
+# комментариев даёт одну строку с id = NULL.
+LATEST_SQL = (
+    'SELECT * FROM ('
+    'SELECT c.id, p.id AS post_id, p.comment_count, c.text, c.created, '
+    'u.username FROM {post} p LEFT JOIN ('
+    'SELECT id, post_id, author_id, text, created FROM {comment} '
+    'WHERE post_id = %s ORDER BY created DESC, id DESC LIMIT %s'
+    ') c ON c.post_id = p.id '
+    'LEFT JOIN {user} u ON u.id = c.author_id WHERE p.id = %s)'
+)
+
+
+def latest_key(post_id):
+    return LATEST_COMMENTS_KEY.format(pk=post_id)
+
+
+def snapshot(comment):
+    """
+    Данные комментария, которые нужны карточке поста.
+    Имя автора приходит в том же запросе полем username.
+    """
+    return {
+        'id': comment.pk,
+        'author': comment.username,
+        'text': Truncator(comment.text).chars(LATEST_COMMENTS_LENGTH),
+        'created': comment.created,
+    }
+
+
+def load_latest(post_ids):
+    """
+    Снимки постов из базы одним запросом: число комментариев
+    и последние из них. Удалённых постов в ответе нет.
+    """
+    if not post_ids:
+        return {}
+    sql = LATEST_SQL.format(
+        post=Post._meta.db_table,
+        comment=Comment._meta.db_table,
+        user=User._meta.db_table,
+    )
+    params = []
+    for post_id in post_ids:
+        params += [post_id, LATEST_COMMENTS, post_id]
+    rows = Comment.objects.raw(
+        ' UNION ALL '.join([sql] * len(post_ids)), params
+    )
+    latest = {}
+    comments = []
+    for row in rows:
+        latest[row.post_id] = {'count': row.comment_count, 'comments': []}
+        if row.pk is not None:
+            comments.append(row)
+    for comment in sorted(
+        comments, key=lambda comment: (comment.created, comment.pk),
+        reverse=True,
+    ):
+        latest[comment.post_id]['comments'].append(snapshot(comment))
+    return latest
+
+
+def refresh_latest(post_id):
+    """Пересобирает снимок поста после нового или удалённого комментария."""
+    if post_id is None:
+        return
+    latest = load_latest([post_id]).get(post_id)
+    if latest is None:
+        cache.delete(latest_key(post_id))
+        return
+    cache.set(latest_key(post_id), latest, LATEST_COMMENTS_TIME)
+
+
+def latest_comments(posts):
+    """
+    Снимки постов страницы: число комментариев и последние из них.
+    Снимок обновляется при каждом комментарии, поэтому карточки
+    берут счётчик отсюда, а не из строки поста в кэше страницы.
+    Снимки достаются из кэша одним get_many, промахи - одним
+    запросом на всю страницу; промахи читаются с основной базы,
+    чтобы в кэш не попал снимок с отставшей реплики.
+    """
+    post_ids = [post.pk for post in posts]
+    keys = {post_id: latest_key(post_id) for post_id in post_ids}
+    cached = cache.get_many(list(keys.values()))
+    latest = {
+        post_id: cached[key]
+        for post_id, key in keys.items()
+        if key in cached
+    }
+    with primary_reads():
+        missed = load_latest([pk for pk in post_ids if pk not in latest])
+    if missed:
+        cache.set_many(
+            {keys[post_id]: value for post_id, value in missed.items()},
+            LATEST_COMMENTS_TIME,
+        )
+    latest.update(missed)
+    return latest
@@ -0,0 +1,49 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def page_etag(request, *parts, forms=False):
+    """
+    ETag страницы из того, что она показывает, без отрисовки.
+    Шапка и формы зависят от пользователя, поэтому он входит в тег.
+    Страница с формой (forms=True) зависит и от CSRF-токена: после
+    нового входа он другой, и старая копия страницы с прежним
+    токеном не должна получить 304.
+    """
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    if forms and request.user.is_authenticated:
+        parts += (request.META.get('CSRF_COOKIE', ''),)
+    digest = hashlib.md5(
+        ':'.join(str(part) for part in (user,) + parts).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, etag, last_modified=None):
+    """Ответ 304, если у клиента уже есть эта версия страницы."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        add_validators(request, response, etag, last_modified)
+    return response
+
+
+def add_validators(request, response, etag, last_modified=None):
+    """
+    Ставит ETag и Last-Modified. Если кэш фрагментов отдал устаревшую
+    страницу, валидаторы не ставятся: иначе клиент запомнил бы
+    старое содержимое под новым тегом.
+    """
+    patch_vary_headers(response, ('Cookie',))
+    if getattr(request, 'page_cache_stale', False):
+        return response
+    if request.method in ('GET', 'HEAD') and response.status_code in (
+        200, 304
+    ):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
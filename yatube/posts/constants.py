@@ -1,6 +1,58 @@
 LIMIT_POST = 10
+LIMIT_COMMENTS = 20
+LATEST_COMMENTS = 3
+LATEST_COMMENTS_LENGTH = 200
+LATEST_COMMENTS_KEY = 'posts:comments:latest:{pk}'
+LATEST_COMMENTS_TIME = 60 * 60 * 24
 LIMIT_SYMBOL = 15
 COUNT_POST_FOR_TEST = 13
 LIMIT_POST_FOR_TEST = 4
-CACHE_TIME = 20
+FEED_CACHE_TIME = 60 * 60 * 24
+FEED_GENERATION_KEY = 'posts:feed:generation'
+FEED_MODIFIED_KEY = 'posts:feed:modified'
 ZERO_FOR_FOLLOW_INDEX = 0
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+TIMELINE_LENGTH = 1000
+CELEBRITY_FOLLOWERS = 10000
+CELEBRITY_CACHE_KEY = 'posts:celebrities'
+CELEBRITY_CACHE_TIME = 60 * 60
+FAN_OUT_BATCH_SIZE = 1000
+TIMELINE_WORKERS = 1
+CARD_CACHE_TIME = 60 * 60 * 24
+CARD_CACHE_KEY = 'posts:card:{pk}:{version}:{variant}'
+SEARCH_SNIPPET_TOKENS = 16
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_SIZES = '(min-width: 992px) 960px, 100vw'
+THUMBNAIL_VARIANTS_KEY = 'posts:thumbnails:{key}'
+THUMBNAIL_VARIANTS_TIME = 86400
+IMAGE_HASH_SHARDS = 2
+IMAGE_LOCK_NAME = '.images.lock'
+GC_MIN_AGE = 3600
+GC_BATCH_SIZE = 1000
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+POST_IMAGE_MAX_PIXELS = 40000000
+POST_IMAGE_MAX_FRAMES = 100
+POST_IMAGE_DOWNSIZE_SIDE = 2560
+SEED_BATCH_SIZE = 1000
+SEED_ZIPF_EXPONENT = 1.1
+SEED_USERNAME = 'seed'
+SEED_DAYS = 365
+SEED_FOLLOW_ROUNDS = 10
+SEED_IMAGE_SIZE = (960, 540)
+SEED_IMAGE_RATIO = 0.3
+BENCHMARK_DATABASE = 'benchmark.sqlite3'
+BENCHMARK_REQUESTS = 200
+BENCHMARK_CONCURRENCY = 4
+BENCHMARK_PAGES = 5
+BENCHMARK_WRITE_SHARE = 0.2
+PAGE_CACHE_KEY = 'posts:page:{name}:{vary}'
+PAGE_CACHE_LOCK_KEY = 'posts:page-lock:{key}'
+PAGE_CACHE_LOCK_TIME = 30
+PAGE_CACHE_STALE_TIME = 60 * 60
+PAGE_CACHE_WAIT = 2
+PAGE_CACHE_POLL = 0.05
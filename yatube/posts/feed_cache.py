@@ -0,0 +1,115 @@
+import time
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from core.routers import primary_reads
+
+from .constants import FEED_CACHE_TIME, FEED_GENERATION_KEY, FEED_MODIFIED_KEY
+from .page_cache import cached_fragment, page_key
+
+# Пост в кэше страницы: по id и updated_at строится ключ карточки.
+FeedEntry = namedtuple('FeedEntry', 'pk updated_at')
+
+
+def feed_generation():
+    """
+    Текущее поколение ленты. Входит в ключи кэшированных фрагментов,
+    поэтому смена поколения сразу делает их все неактуальными.
+    """
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(FEED_GENERATION_KEY, generation, FEED_CACHE_TIME):
+            generation = cache.get(FEED_GENERATION_KEY, generation)
+    return generation
+
+
+def bump_feed_generation():
+    """Начинает новое поколение ленты после изменения постов."""
+    cache.set_many(
+        {
+            FEED_GENERATION_KEY: uuid.uuid4().hex,
+            FEED_MODIFIED_KEY: int(time.time()),
+        },
+        FEED_CACHE_TIME,
+    )
+
+
+def touch_feed_modified():
+    """
+    Комментарий меняет карточки, но не списки постов страниц:
+    поколение остаётся прежним, сдвигается только Last-Modified.
+    """
+    cache.set(FEED_MODIFIED_KEY, int(time.time()), FEED_CACHE_TIME)
+
+
+def feed_modified():
+    """
+    Время начала текущего поколения ленты для Last-Modified.
+    None, если поколение началось без bump_feed_generation
+    (например, кэш был очищен) и время неизвестно.
+    """
+    return cache.get(FEED_MODIFIED_KEY)
+
+
+class FeedPage:
+    """
+    Страница ленты в кэше: id постов с версиями и курсоры соседних
+    страниц, без разметки. Карточки собираются из своего кэша по
+    версиям, поэтому комментарии не требуют нового поколения ленты.
+    Только что посчитанная страница держит и сами посты, чтобы
+    не читать их для карточек второй раз; в кэш они не попадают.
+    """
+
+    def __init__(self, page):
+        self._objects = list(page)
+        self.posts = [
+            FeedEntry(post.pk, post.updated_at) for post in self._objects
+        ]
+        self._has_next = page.has_next()
+        self._has_previous = page.has_previous()
+        self.next_cursor = page.next_cursor
+        self.previous_cursor = page.previous_cursor
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_objects')
+        return state
+
+    def __iter__(self):
+        return iter(getattr(self, '_objects', None) or self.posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+def feed_page(request, name, generation, vary, page):
+    """
+    Страница ленты из кэша по поколению. page - ленивая страница
+    пагинатора, она вычисляется только при промахе. Если кэш отдал
+    устаревшую страницу, запрос помечается page_cache_stale.
+    Страница живёт в общем кэше всё поколение, поэтому при промахе
+    читается с основной базы, а не с возможно отставшей реплики.
+    """
+    def compute():
+        with primary_reads():
+            return FeedPage(page)
+
+    return cached_fragment(
+        page_key(name, vary),
+        generation,
+        compute,
+        FEED_CACHE_TIME,
+        on_stale=lambda: setattr(request, 'page_cache_stale', True),
+    )
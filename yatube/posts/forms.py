@@ -1,7 +1,46 @@
 from django import forms
+from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
+from .constants import (POST_IMAGE_FORMATS, POST_IMAGE_MAX_FRAMES,
+                        POST_IMAGE_MAX_PIXELS, POST_IMAGE_MAX_SIZE)
 from .models import Comment, Post
+from .uploads import inspect_image
+
+
+IMAGE_ERRORS = {
+    'too_large': 'Файл больше %(limit)s МБ.',
+    'invalid_image': forms.ImageField.default_error_messages['invalid_image'],
+    'format': 'Поддерживаются форматы: %(formats)s.',
+    'dimensions': 'Картинка больше %(limit)s мегапикселей.',
+    'frames': 'В анимации больше %(limit)s кадров.',
+}
+
+
+def image_error(code, **params):
+    return ValidationError(IMAGE_ERRORS[code], code=code, params=params)
+
+
+def validate_post_image(file):
+    """
+    Проверяет размер, формат, пиксели и кадры картинки по заголовкам,
+    не декодируя её, поэтому тяжёлые файлы отсекаются до того,
+    как ImageField проверит файл через Pillow.
+    """
+    if file.size > POST_IMAGE_MAX_SIZE:
+        raise image_error(
+            'too_large', limit=POST_IMAGE_MAX_SIZE // (1024 * 1024)
+        )
+    try:
+        image_format, width, height, frames = inspect_image(file)
+    except Exception as error:
+        raise image_error('invalid_image') from error
+    if image_format not in POST_IMAGE_FORMATS:
+        raise image_error('format', formats=', '.join(POST_IMAGE_FORMATS))
+    if width * height > POST_IMAGE_MAX_PIXELS:
+        raise image_error('dimensions', limit=POST_IMAGE_MAX_PIXELS // 10**6)
+    if frames > POST_IMAGE_MAX_FRAMES:
+        raise image_error('frames', limit=POST_IMAGE_MAX_FRAMES)
 
 
 class PostForm(ModelForm):
@@ -14,6 +53,24 @@ class PostForm(ModelForm):
             'text': 'Введите текст поста',
         }
 
+    def full_clean(self):
+        """
+        Картинка проверяется до полей формы: не прошедший проверку
+        файл не передаётся в ImageField и не открывается Pillow.
+        """
+        key = self.add_prefix('image')
+        error = None
+        if self.is_bound and self.files.get(key):
+            try:
+                validate_post_image(self.files[key])
+            except ValidationError as invalid:
+                error = invalid
+                self.files = self.files.copy()
+                del self.files[key]
+        super().full_clean()
+        if error is not None:
+            self.add_error('image', error)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,79 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImageBlob, Post
+from .storage import image_lock, image_storage
+from .thumbnails import delete_thumbnails
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_image(name):
+    """
+    Пост начал ссылаться на файл: счётчик ссылок растёт на 1.
+    После фиксации проверяется, что файл не удалила транзакция,
+    освободившая его последнюю ссылку чуть раньше.
+    """
+    if not name:
+        return
+    blob, created = ImageBlob.objects.get_or_create(
+        name=name, defaults={'refs': 1}
+    )
+    if not created:
+        ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+    transaction.on_commit(lambda: image_storage.restore(name))
+
+
+def release_image(name):
+    """
+    Пост перестал ссылаться на файл. Когда ссылок не осталось,
+    файл и его миниатюры удаляются после фиксации транзакции.
+    """
+    if not name:
+        return
+    ImageBlob.objects.filter(name=name, refs__gte=1).update(
+        refs=F('refs') - 1
+    )
+    deleted, _ = ImageBlob.objects.filter(name=name, refs=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: delete_image(name))
+
+
+def delete_image(name):
+    """
+    Удаляет файл и миниатюры, если за время транзакции
+    на него не сослался новый пост с той же картинкой.
+    """
+    with image_lock(image_storage):
+        if ImageBlob.objects.filter(name=name).exists():
+            return
+        try:
+            delete_thumbnails(name)
+        except Exception:
+            logger.exception('Не удалось удалить картинку %s', name)
+
+
+@transaction.atomic
+def replace_image(name, new_name):
+    """
+    Переводит все посты с файла name на new_name вместе со счётчиком
+    ссылок; старый файл удаляется после фиксации транзакции.
+    """
+    if name == new_name:
+        return
+    # Новая версия updated_at сбрасывает карточки со старым адресом.
+    refs = Post.objects.filter(image=name).update(
+        image=new_name, updated_at=timezone.now()
+    )
+    ImageBlob.objects.filter(name=name).delete()
+    blob, created = ImageBlob.objects.get_or_create(
+        name=new_name, defaults={'refs': refs}
+    )
+    if not created:
+        ImageBlob.objects.filter(name=new_name).update(
+            refs=F('refs') + refs
+        )
+    transaction.on_commit(lambda: delete_image(name))
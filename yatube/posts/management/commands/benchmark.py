@@ -0,0 +1,168 @@
+import json
+import os
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts.benchmark import SCENARIOS, Dataset, run_scenario
+from posts.constants import (BENCHMARK_CONCURRENCY, BENCHMARK_DATABASE,
+                             BENCHMARK_REQUESTS)
+from posts.models import Post
+from posts.seeding import Seeder
+from yatube.settings.base import shared_cache
+
+COLUMNS = ('requests', 'errors', 'rps', 'p50', 'p95', 'p99')
+# Режим SQLite и Python по умолчанию, для сравнения с SQLITE_PRAGMAS.
+SQLITE_DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+
+
+def benchmark_caches(name):
+    """
+    Кэш замера. Кэш общий с работающим сайтом, поэтому у замера
+    свой файл SQLite (или тот же memcached) и новый префикс ключей
+    на каждый этап: этап начинается с холодного кэша без
+    cache.clear(), а живые ключи ленты замер не видит и не трогает.
+    """
+    cache = shared_cache('benchmark')
+    cache['KEY_PREFIX'] = f'yatube:benchmark:{name}:{uuid.uuid4().hex}'
+    return {'default': cache}
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер страниц постов на отдельной базе '
+        'с синтетическими данными: пропускная способность и '
+        'перцентили задержки по сценариям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios',
+            nargs='*',
+            choices=[[]] + list(SCENARIOS),
+            help='Сценарии; по умолчанию все.',
+        )
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=60000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=BENCHMARK_REQUESTS,
+            help='Запросов на сценарий.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=BENCHMARK_CONCURRENCY
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Оставить базу замера и заполнить её только один раз.',
+        )
+        parser.add_argument(
+            '--sqlite-defaults',
+            action='store_true',
+            help='Замерить без SQLITE_PRAGMAS, с настройками SQLite '
+                 'по умолчанию.',
+        )
+        parser.add_argument('--json', help='Сохранить результаты в файл.')
+        parser.add_argument(
+            '--baseline',
+            help='Файл --json другой ветки для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        # Отдельная файловая база: потоки нагрузки видят одни и те же
+        # данные, а с --keepdb её можно переиспользовать между ветками.
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_settings['NAME'] = os.path.join(
+            settings.BASE_DIR, BENCHMARK_DATABASE
+        )
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        pragmas = settings.SQLITE_PRAGMAS
+        if options['sqlite_defaults']:
+            pragmas = SQLITE_DEFAULT_PRAGMAS
+        # Без DEBUG: debug_toolbar и connection.queries исказили бы замер.
+        # Заполнение базы тоже пишет в кэш, поэтому и оно идёт
+        # мимо кэша работающего сайта.
+        with override_settings(
+            DEBUG=False,
+            SQLITE_PRAGMAS=pragmas,
+            CACHES=benchmark_caches('seed'),
+        ):
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=keepdb
+            )
+            try:
+                results = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=keepdb
+                )
+        self.report(results, options['baseline'])
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump(results, file, indent=2)
+
+    def run(self, options):
+        if not Post.objects.exists():
+            self.stdout.write('Заполнение базы...')
+            Seeder(options['seed']).run(
+                options['users'],
+                options['groups'],
+                options['posts'],
+                options['comments'],
+                options['follows'],
+            )
+        dataset = Dataset()
+        results = {}
+        for name in options['scenarios'] or SCENARIOS:
+            with override_settings(CACHES=benchmark_caches(name)):
+                results[name] = run_scenario(
+                    name,
+                    dataset,
+                    options['requests'],
+                    options['concurrency'],
+                    options['seed'],
+                )
+        return results
+
+    def report(self, results, baseline_path):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path) as file:
+                baseline = json.load(file)
+        width = max(len(name) for name in results)
+        self.stdout.write('  '.join(
+            ['сценарий'.ljust(width)] + [column.rjust(8) for column in COLUMNS]
+        ))
+        for name, row in results.items():
+            cells = [
+                f'{row[column]:8.1f}' if isinstance(row[column], float)
+                else f'{row[column]:8}'
+                for column in COLUMNS
+            ]
+            line = '  '.join([name.ljust(width)] + cells)
+            before = baseline.get(name)
+            if before:
+                line += '  rps {:+.0%}, p95 {:+.0%}'.format(
+                    row['rps'] / before['rps'] - 1,
+                    row['p95'] / before['p95'] - 1,
+                )
+            self.stdout.write(line)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed_cache import bump_feed_generation
+from posts.images import replace_image
+from posts.models import ImageBlob, Post
+from posts.storage import image_storage, is_hashed_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки, загруженные до хранилища по содержимому, '
+        'в имена по хэшу: одинаковые файлы сливаются в один, '
+        'старые копии и их миниатюры удаляются.'
+    )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        moved = missing = 0
+        for name in list(names):
+            if is_hashed_name(name):
+                continue
+            if not image_storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Нет файла: {name}')
+                continue
+            with image_storage.open(name) as content:
+                new_name = image_storage.save(name, content)
+            replace_image(name, new_name)
+            moved += 1
+        if moved:
+            bump_feed_generation()
+        unique = ImageBlob.objects.count()
+        self.stdout.write(
+            f'Перенесено картинок: {moved}, уникальных файлов: {unique}, '
+            f'без файла: {missing}'
+        )
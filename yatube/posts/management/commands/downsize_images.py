@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from posts.constants import POST_IMAGE_DOWNSIZE_SIDE
+from posts.feed_cache import bump_feed_generation
+from posts.images import replace_image
+from posts.models import Post
+from posts.storage import image_storage
+from posts.uploads import downsize_image, inspect_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает оригиналы картинок постов, у которых большая сторона '
+        'длиннее заданной. Анимации не трогает. Запускается по расписанию, '
+        'чтобы не нагружать запросы загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--side',
+            type=int,
+            default=POST_IMAGE_DOWNSIZE_SIDE,
+            help='Наибольшая допустимая сторона оригинала в пикселях.',
+        )
+
+    def handle(self, *args, **options):
+        side = options['side']
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        resized = failed = 0
+        for name in list(names):
+            try:
+                with image_storage.open(name) as file:
+                    _, width, height, frames = inspect_image(file)
+                    if max(width, height) <= side or frames > 1:
+                        continue
+                    content = downsize_image(file, side)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+                continue
+            replace_image(name, image_storage.save(name, content))
+            resized += 1
+        if resized:
+            bump_feed_generation()
+        self.stdout.write(f'Уменьшено картинок: {resized}, ошибок: {failed}')
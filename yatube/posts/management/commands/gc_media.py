@@ -0,0 +1,197 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.constants import GC_BATCH_SIZE, GC_MIN_AGE
+from posts.models import ImageBlob, Post
+from posts.storage import image_storage
+from posts.thumbnails import expected_thumbnails
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def kv_rows(identity):
+    """Записи KV-хранилища sorl одного вида, без загрузки всех в память."""
+    return (
+        KVStore.objects.filter(key__startswith=add_prefix('', identity))
+        .values_list('key', 'value')
+        .iterator()
+    )
+
+
+def stale_files(storage, directory, keep, min_age):
+    """
+    Файлы каталога, которых нет в множестве keep.
+    Свежие файлы пропускаются: их пост может быть ещё не сохранён.
+    """
+    root = storage.path(directory)
+    deadline = time.time() - min_age
+    for path, _, files in os.walk(root):
+        for filename in files:
+            full_path = os.path.join(path, filename)
+            name = os.path.relpath(full_path, storage.location)
+            name = name.replace(os.sep, '/')
+            if name in keep:
+                continue
+            stat = os.stat(full_path)
+            if stat.st_mtime > deadline:
+                continue
+            yield name, stat.st_size
+
+
+def remove_empty_dirs(root):
+    """Удаляет опустевшие каталоги шардов, сам root остаётся."""
+    for path, dirs, files in os.walk(root, topdown=False):
+        if path != root and not os.listdir(path):
+            os.rmdir(path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки, на которые не ссылается ни один пост, '
+        'их миниатюры и устаревшие записи KV-хранилища sorl.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что и сколько байт будет удалено.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=GC_MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=GC_BATCH_SIZE,
+            help='Сколько файлов или ключей удалять за раз.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        min_age = options['min_age']
+
+        # Множества имён строятся одним проходом по базе,
+        # дальше каждый файл проверяется без запросов.
+        sources = set(
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+            .iterator()
+        )
+        thumbnails, stale_keys = self.live_thumbnails(sources)
+
+        upload_to = Post._meta.get_field('image').upload_to
+        originals, original_bytes = self.delete_files(
+            image_storage, upload_to, sources, min_age
+        )
+        cached, cached_bytes = self.delete_files(
+            default.storage,
+            thumbnail_settings.THUMBNAIL_PREFIX,
+            thumbnails,
+            min_age,
+        )
+        keys = self.delete_keys(stale_keys)
+        blobs = self.delete_blobs(sources)
+
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            f'{verb}: оригиналов {originals}, миниатюр {cached}, '
+            f'ключей KV {keys}, записей ImageBlob {blobs}; '
+            f'освобождается байт: {original_bytes + cached_bytes}'
+        )
+
+    def live_thumbnails(self, sources):
+        """
+        Миниатюры живых картинок и ключи KV, которые пора удалить.
+        Имена из KV дополняются расчётными именами миниатюр пула,
+        которые ещё не попали в KV-хранилище.
+        """
+        names = {
+            del_prefix(key): json.loads(value)['name']
+            for key, value in kv_rows('image')
+        }
+        live = set()
+        stale_keys = []
+        for key, value in kv_rows('thumbnails'):
+            if names.get(del_prefix(key)) in sources:
+                live.update(
+                    names[thumbnail_key]
+                    for thumbnail_key in json.loads(value)
+                    if thumbnail_key in names
+                )
+            else:
+                stale_keys.append(key)
+        for name in sources:
+            live.update(expected_thumbnails(name))
+        stale_keys.extend(
+            add_prefix(key)
+            for key, name in names.items()
+            if name not in sources and name not in live
+        )
+        return live, stale_keys
+
+    def delete_files(self, storage, directory, keep, min_age):
+        count = size = 0
+        files = stale_files(storage, directory, keep, min_age)
+        for batch in batched(files, self.batch_size):
+            count += len(batch)
+            size += sum(file_size for _, file_size in batch)
+            if self.dry_run:
+                continue
+            for name, _ in batch:
+                storage.delete(name)
+        if count and not self.dry_run:
+            remove_empty_dirs(storage.path(directory))
+        return count, size
+
+    def delete_keys(self, keys):
+        if not self.dry_run:
+            for batch in batched(keys, self.batch_size):
+                default.kvstore._delete_raw(*batch)
+        return len(keys)
+
+    def delete_blobs(self, sources):
+        """
+        Счётчики ссылок файлов, на которые уже не ссылаются посты.
+        Множество sources взято до долгого обхода каталогов, поэтому
+        перед удалением каждая пачка заново сверяется с постами.
+        """
+        stale = (
+            name
+            for name in ImageBlob.objects.values_list(
+                'name', flat=True
+            ).iterator()
+            if name not in sources
+        )
+        count = 0
+        for batch in batched(stale, self.batch_size):
+            blobs = ImageBlob.objects.filter(name__in=batch).annotate(
+                used=Exists(Post.objects.filter(image=OuterRef('name')))
+            ).filter(used=False)
+            if self.dry_run:
+                count += blobs.count()
+            else:
+                count += blobs.delete()[0]
+        return count
@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import (Comment, Follow, Group, GroupStats, Post, User,
+                          UserStats)
+
+USER_FIELDS = ('posts_count', 'followers_count', 'following_count')
+GROUP_FIELDS = ('posts_count',)
+
+
+def grouped_counts(queryset, key, ids):
+    """Число строк queryset для каждого id из пачки одним запросом."""
+    return dict(
+        queryset.filter(**{f'{key}__in': ids})
+        .values_list(key)
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет денормализованные счётчики пользователей, групп '
+        'и комментариев постов с исходными таблицами '
+        'и исправляет расхождения пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей или групп сверять за раз.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed_users = self.reconcile(
+            User, UserStats, 'user_id', USER_FIELDS, batch_size,
+            lambda ids: {
+                'posts_count': grouped_counts(Post.objects, 'author', ids),
+                'followers_count': grouped_counts(
+                    Follow.objects, 'author', ids
+                ),
+                'following_count': grouped_counts(
+                    Follow.objects, 'user', ids
+                ),
+            },
+        )
+        fixed_groups = self.reconcile(
+            Group, GroupStats, 'group_id', GROUP_FIELDS, batch_size,
+            lambda ids: {
+                'posts_count': grouped_counts(Post.objects, 'group', ids),
+            },
+        )
+        fixed_posts = self.reconcile_comments(batch_size)
+        self.stdout.write(
+            f'Исправлено счётчиков: пользователей {fixed_users}, '
+            f'групп {fixed_groups}, постов {fixed_posts}'
+        )
+
+    def reconcile_comments(self, batch_size):
+        """Счётчик лежит в самой таблице постов, а не в отдельной."""
+        fixed = 0
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'comment_count')[:batch_size]
+            )
+            if not posts:
+                return fixed
+            last_pk = posts[-1][0]
+            counts = grouped_counts(
+                Comment.objects, 'post', [pk for pk, _ in posts]
+            )
+            to_update = [
+                Post(pk=pk, comment_count=counts.get(pk, 0))
+                for pk, count in posts
+                if counts.get(pk, 0) != count
+            ]
+            Post.objects.bulk_update(to_update, ['comment_count'])
+            fixed += len(to_update)
+
+    def reconcile(self, model, stats_model, key, fields, batch_size, count):
+        fixed = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return fixed
+            last_pk = ids[-1]
+            counts = count(ids)
+            existing = stats_model.objects.in_bulk(ids)
+            to_create = []
+            to_update = []
+            for pk in ids:
+                values = {
+                    field: counts[field].get(pk, 0) for field in fields
+                }
+                stats = existing.get(pk)
+                if stats is None:
+                    to_create.append(stats_model(**{key: pk}, **values))
+                    continue
+                if any(getattr(stats, f) != v for f, v in values.items()):
+                    for field, value in values.items():
+                        setattr(stats, field, value)
+                    to_update.append(stats)
+            stats_model.objects.bulk_create(to_create, ignore_conflicts=True)
+            stats_model.objects.bulk_update(to_update, fields)
+            fixed += len(to_create) + len(to_update)
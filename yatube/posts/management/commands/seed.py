@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.constants import (SEED_BATCH_SIZE, SEED_IMAGE_RATIO,
+                             SEED_USERNAME, SEED_ZIPF_EXPONENT)
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу синтетическими пользователями, группами, '
+        'постами, комментариями и подписками через bulk_create. '
+        'Распределения постов по авторам и подписок - степенные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument(
+            '--posts-exponent',
+            type=float,
+            default=SEED_ZIPF_EXPONENT,
+            help='Показатель степенного закона постов на автора; '
+                 '0 - равномерно.',
+        )
+        parser.add_argument(
+            '--follows-exponent',
+            type=float,
+            default=SEED_ZIPF_EXPONENT,
+            help='Показатель степенного закона подписок и подписчиков.',
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=0,
+            help='Размер набора картинок, из которого берутся картинки '
+                 'постов; 0 - без картинок.',
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=SEED_IMAGE_RATIO,
+            help='Доля постов с картинкой.',
+        )
+        parser.add_argument(
+            '--password',
+            default=SEED_USERNAME,
+            help='Общий пароль пользователей.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=SEED_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        Seeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            posts_exponent=options['posts_exponent'],
+            follows_exponent=options['follows_exponent'],
+            image_ratio=options['image_ratio'],
+            password=options['password'],
+            log=self.stdout.write,
+        ).run(
+            options['users'],
+            options['groups'],
+            options['posts'],
+            options['comments'],
+            options['follows'],
+            options['images'],
+        )
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - start:.1f} с'
+        )
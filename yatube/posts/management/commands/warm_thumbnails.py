@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from posts.constants import THUMBNAIL_WORKERS
+from posts.models import Post
+from posts.thumbnails import generate_variants, responsive_thumbnail
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее создаёт все размеры и форматы миниатюр картинок '
+        'существующих постов в несколько потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=THUMBNAIL_WORKERS,
+            help='Число потоков для генерации.',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        created = failed = 0
+        # Потоки только пишут файлы, KV-хранилище sorl и кэш вариантов
+        # заполняются в основном потоке, чтобы не делить соединение с базой.
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(generate_variants, name): name
+                for name in names.iterator()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                responsive_thumbnail(name)
+                created += 1
+        self.stdout.write(
+            f'Готово миниатюр: {created}, ошибок: {failed}'
+        )
@@ -0,0 +1,85 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE posts_search USING fts5(
+        text, post_id UNINDEXED, tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER posts_search_post_ai AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_search(rowid, text, post_id)
+        VALUES (new.id * 2, new.text, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_post_au AFTER UPDATE OF text ON posts_post
+    BEGIN
+        UPDATE posts_search SET text = new.text WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_post_ad AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_comment_ai AFTER INSERT ON posts_comment
+    BEGIN
+        INSERT INTO posts_search(rowid, text, post_id)
+        VALUES (new.id * 2 + 1, new.text, new.post_id);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_comment_au
+    AFTER UPDATE OF text, post_id ON posts_comment BEGIN
+        UPDATE posts_search SET text = new.text, post_id = new.post_id
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_search_comment_ad AFTER DELETE ON posts_comment
+    BEGIN
+        DELETE FROM posts_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO posts_search(rowid, text, post_id)
+    SELECT id * 2, text, id FROM posts_post
+    """,
+    """
+    INSERT INTO posts_search(rowid, text, post_id)
+    SELECT id * 2 + 1, text, post_id FROM posts_comment
+    """,
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS posts_search_post_ai',
+    'DROP TRIGGER IF EXISTS posts_search_post_au',
+    'DROP TRIGGER IF EXISTS posts_search_post_ad',
+    'DROP TRIGGER IF EXISTS posts_search_comment_ai',
+    'DROP TRIGGER IF EXISTS posts_search_comment_au',
+    'DROP TRIGGER IF EXISTS posts_search_comment_ad',
+    'DROP TABLE IF EXISTS posts_search',
+)
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        # FTS5 есть только в SQLite, на других базах поиск идёт через LIKE.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(CREATE_SQL), run_sql(DROP_SQL)),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-17 21:06
+
+from django.db import migrations, models
+from django.db.models import Count
+import posts.storage
+
+
+def backfill_blobs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    refs = (
+        Post.objects.exclude(image='')
+        .values_list('image')
+        .annotate(refs=Count('pk'))
+        .order_by()
+    )
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=name, refs=count) for name, count in refs],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Файл')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл картинки',
+                'verbose_name_plural': 'Файлы картинок',
+            },
+        ),
+        # Хранилище не меняет схему: без SeparateDatabaseAndState
+        # SQLite пересоздал бы posts_post и потерял триггеры поиска.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='post',
+                    name='image',
+                    field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-17 22:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# SQLite добавляет столбец пересборкой таблицы постов, и триггеры
+# поискового индекса из 0016_search пропадают вместе со старой таблицей.
+POST_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_search_post_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_search(rowid, text, post_id)
+        VALUES (new.id * 2, new.text, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_search_post_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        UPDATE posts_search SET text = new.text WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_search_post_ad
+    AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_search WHERE rowid = old.id * 2;
+    END
+    """,
+)
+
+
+def restore_post_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in POST_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .values('post')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Post.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_post_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+        migrations.RunPython(restore_post_triggers, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from .constants import LIMIT_SYMBOL
+from .storage import image_storage
 
 User = get_user_model()
 
@@ -28,9 +29,11 @@ class Post(models.Model):
     """
     text - запись сообщения
     pub_date - дата публикации
+    updated_at - дата последнего изменения, версия кэша карточки
     author - автор поста
     group - группа поста
-    image - картинка к посту.
+    image - картинка к посту
+    comment_count - число комментариев, поддерживается сигналами.
     """
     text = models.TextField(
         verbose_name='Текст поста',
@@ -40,6 +43,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -58,13 +65,33 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True,
     )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = ('Пост')
         verbose_name_plural = ('Посты')
+        indexes = (
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:LIMIT_SYMBOL]
@@ -104,6 +131,12 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = ('Коммент')
         verbose_name_plural = ('Комменты')
+        indexes = (
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:LIMIT_SYMBOL]
@@ -128,9 +161,111 @@ class Follow(models.Model):
     class Meta:
         verbose_name = ('Подписка')
         verbose_name_plural = ('Подписки')
+        indexes = (
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name='unique_user_author'
             ),
         )
+
+
+class UserStats(models.Model):
+    """
+    Денормализованные счётчики пользователя.
+    user - пользователь
+    posts_count - число постов
+    followers_count - число подписчиков
+    following_count - число подписок.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = ('Счётчики пользователя')
+        verbose_name_plural = ('Счётчики пользователей')
+
+
+class GroupStats(models.Model):
+    """
+    Денормализованные счётчики группы.
+    group - группа
+    posts_count - число постов группы.
+    """
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+
+    class Meta:
+        verbose_name = ('Счётчики группы')
+        verbose_name_plural = ('Счётчики групп')
+
+
+class Timeline(models.Model):
+    """
+    Материализованная лента подписок (fan-out on write).
+    user - подписчик, в чью ленту попал пост
+    post - пост автора, на которого подписан user
+    pub_date - копия даты публикации поста для сортировки ленты.
+    """
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = ('Запись ленты')
+        verbose_name_plural = ('Записи ленты')
+        indexes = (
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_user_post'
+            ),
+        )
+
+
+class ImageBlob(models.Model):
+    """
+    Файл картинки, общий для постов с одинаковым содержимым.
+    name - имя файла в хранилище
+    refs - число постов, которые ссылаются на файл.
+    """
+    name = models.CharField('Файл', max_length=100, primary_key=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = ('Файл картинки')
+        verbose_name_plural = ('Файлы картинок')
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from .constants import (PAGE_CACHE_KEY, PAGE_CACHE_LOCK_KEY,
+                        PAGE_CACHE_LOCK_TIME, PAGE_CACHE_POLL,
+                        PAGE_CACHE_STALE_TIME, PAGE_CACHE_WAIT)
+
+
+def page_key(name, vary):
+    """Ключ фрагмента: имя и хэш значений, от которых он зависит."""
+    digest = hashlib.md5(
+        ':'.join(str(value) for value in vary).encode()
+    ).hexdigest()
+    return PAGE_CACHE_KEY.format(name=name, vary=digest)
+
+
+def _store(key, version, value, timeout):
+    # Запись живёт дольше своей свежести, чтобы устаревший фрагмент
+    # можно было отдавать, пока один запрос считает новый.
+    cache.set(
+        key,
+        (version, time.time() + timeout, value),
+        timeout + PAGE_CACHE_STALE_TIME,
+    )
+
+
+def _wait(key, version):
+    """Ждёт, пока фрагмент посчитает запрос, взявший блокировку."""
+    deadline = time.monotonic() + PAGE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(PAGE_CACHE_POLL)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[2]
+    return None
+
+
+def cached_fragment(key, version, compute, timeout, on_stale=None):
+    """
+    Кэш дорогого фрагмента страницы с защитой от лавины промахов.
+    Фрагмент свеж timeout секунд и пока его версия (например,
+    поколение ленты) совпадает с текущей. Пересчитывает его один
+    запрос - тот, что взял блокировку через атомарный cache.add;
+    остальные в это время отдают устаревший фрагмент (и вызывают
+    on_stale), а если его нет совсем, недолго ждут нового.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        entry_version, fresh_until, value = entry
+        if entry_version == version and time.time() < fresh_until:
+            return value
+    lock = PAGE_CACHE_LOCK_KEY.format(key=key)
+    if not cache.add(lock, 1, PAGE_CACHE_LOCK_TIME):
+        if entry is not None:
+            if on_stale is not None:
+                on_stale()
+            return entry[2]
+        value = _wait(key, version)
+        if value is not None:
+            return value
+        # Владелец блокировки не успел: считаем сами, не сохраняя.
+        return compute()
+    try:
+        value = compute()
+        _store(key, version, value, timeout)
+    finally:
+        cache.delete(lock)
+    return value
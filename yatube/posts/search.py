@@ -0,0 +1,167 @@
+import base64
+import binascii
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .constants import LIMIT_POST, SEARCH_SNIPPET_TOKENS
+from .models import Post
+from .utils import feed_posts
+
+# Управляющие символы вместо тегов: snippet() не экранирует текст,
+# поэтому сначала экранируем весь фрагмент, а потом подставляем <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+SEARCH_SQL = f"""
+    SELECT rowid, post_id, score, snippet FROM (
+        SELECT
+            rowid,
+            post_id,
+            bm25(posts_search) AS score,
+            snippet(
+                posts_search, 0, '{MARK_START}', '{MARK_END}', '…',
+                {SEARCH_SNIPPET_TOKENS}
+            ) AS snippet
+        FROM posts_search
+        WHERE posts_search MATCH %s AND post_id IS NOT NULL
+    )
+    WHERE score > %s OR (score = %s AND rowid > %s)
+    ORDER BY score, rowid
+    LIMIT %s
+"""
+
+POST_IDS_SQL = (
+    'SELECT post_id FROM posts_search '
+    'WHERE posts_search MATCH %s AND rowid %% 2 = 0'
+)
+
+
+def fts_available():
+    """Полнотекстовый индекс FTS5 создаётся миграцией только в SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """
+    Превращает ввод пользователя в выражение FTS5: каждое слово
+    берётся в кавычки, поэтому спецсимволы не ломают запрос.
+    """
+    words = query.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def encode_search_cursor(score, rowid):
+    raw = f'{score!r}|{rowid}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor):
+    """Для пустого или испорченного токена возвращает начало выдачи."""
+    start = (float('-inf'), 0)
+    if not cursor:
+        return start
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, rowid = base64.urlsafe_b64decode(
+            padded.encode()
+        ).decode().split('|')
+        return float(score), int(rowid)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return start
+
+
+class SearchResult:
+    """
+    Найденный документ: пост или комментарий к нему.
+    post - пост, к которому ведёт результат
+    snippet - фрагмент текста с подсвеченными словами
+    is_comment - совпадение найдено в комментарии.
+    """
+
+    def __init__(self, post, snippet, is_comment):
+        self.post = post
+        self.snippet = snippet
+        self.is_comment = is_comment
+
+
+class SearchPage:
+    """Страница выдачи с ключевой пагинацией по (score, rowid)."""
+
+    def __init__(self, results, next_cursor):
+        self.results = results
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+
+def search(query, cursor=None, limit=LIMIT_POST):
+    """
+    Ищет запрос в постах и комментариях по FTS5,
+    результаты упорядочены по релевантности bm25.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return SearchPage([], None)
+    if not fts_available():
+        posts = feed_posts(Post.objects.filter(text__icontains=query))
+        return SearchPage(
+            [SearchResult(post, post.text, False) for post in posts[:limit]],
+            None,
+        )
+
+    after_score, after_rowid = decode_search_cursor(cursor)
+    with connection.cursor() as db:
+        db.execute(
+            SEARCH_SQL,
+            [expression, after_score, after_score, after_rowid, limit + 1],
+        )
+        rows = db.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    posts = feed_posts(Post.objects.all()).in_bulk(
+        [post_id for _, post_id, _, _ in rows]
+    )
+    results = [
+        SearchResult(posts[post_id], highlight(snippet), rowid % 2 == 1)
+        for rowid, post_id, _, snippet in rows
+        if post_id in posts
+    ]
+    next_cursor = None
+    if has_next:
+        last_rowid, _, last_score, _ = rows[-1]
+        next_cursor = encode_search_cursor(last_score, last_rowid)
+    return SearchPage(results, next_cursor)
+
+
+def filter_matching(queryset, query):
+    """
+    Оставляет в queryset посты, в тексте которых есть все слова
+    запроса. Совпадения отбираются подзапросом id IN (SELECT ...),
+    а не списком id: частое слово не упирается в лимит переменных
+    SQLite и не читает всю выдачу в Python. RawSQL здесь не подходит:
+    IN ((SELECT ...)) SQLite считает скалярным подзапросом.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    column = '{}.{}'.format(
+        connection.ops.quote_name(queryset.model._meta.db_table),
+        connection.ops.quote_name(queryset.model._meta.pk.column),
+    )
+    return queryset.extra(
+        where=[f'{column} IN ({POST_IDS_SQL})'], params=[expression]
+    )
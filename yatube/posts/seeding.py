@@ -0,0 +1,341 @@
+import heapq
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO, StringIO
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from .constants import (CELEBRITY_CACHE_KEY, SEED_BATCH_SIZE, SEED_DAYS,
+                        SEED_FOLLOW_ROUNDS, SEED_IMAGE_RATIO, SEED_IMAGE_SIZE,
+                        SEED_USERNAME, SEED_ZIPF_EXPONENT, TIMELINE_LENGTH)
+from .feed_cache import bump_feed_generation
+from .models import Comment, Follow, Group, ImageBlob, Post, Timeline, User
+from .storage import image_storage
+from .timeline import celebrity_ids
+
+WORDS = (
+    'лето море город книга дорога утро вечер друг работа музыка '
+    'кофе дождь солнце поезд река лес снег окно улица письмо'
+).split()
+
+# Даты читаются и пишутся курсором в формате базы,
+# без преобразования в datetime и обратно на каждой записи ленты.
+RECENT_POSTS_SQL = (
+    'SELECT author_id, pub_date, id FROM {post} '
+    'ORDER BY author_id, pub_date DESC, id DESC'
+)
+INSERT_TIMELINE_SQL = (
+    'INSERT INTO {timeline} (user_id, pub_date, post_id) VALUES (%s, %s, %s)'
+)
+
+
+def zipf_weights(count, exponent=SEED_ZIPF_EXPONENT):
+    """Веса степенного закона: первый в списке самый популярный."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+@contextmanager
+def explicit_dates(model, *names):
+    """
+    Отключает auto_now_add у полей модели, чтобы bulk_create
+    сохранил даты, разбросанные по времени, а не текущий момент.
+    """
+    fields = [model._meta.get_field(name) for name in names]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def new_pks(model, last_pk):
+    return list(
+        model.objects.filter(pk__gt=last_pk)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def last_pk(model):
+    pks = model.objects.order_by('-pk').values_list('pk', flat=True)
+    return pks.first() or 0
+
+
+class Seeder:
+    """
+    Синтетические данные с перекосом, как в живой соцсети:
+    немногие авторы пишут и собирают подписчиков больше остальных,
+    популярные посты чаще комментируют. Одинаковый seed даёт
+    одинаковый набор данных, поэтому замеры веток сравнимы.
+    """
+
+    def __init__(self, seed=0, batch_size=SEED_BATCH_SIZE,
+                 posts_exponent=SEED_ZIPF_EXPONENT,
+                 follows_exponent=SEED_ZIPF_EXPONENT,
+                 image_ratio=SEED_IMAGE_RATIO, password=SEED_USERNAME,
+                 log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.posts_exponent = posts_exponent
+        self.follows_exponent = follows_exponent
+        self.image_ratio = image_ratio
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    @contextmanager
+    def stage(self, title):
+        start = time.perf_counter()
+        yield
+        self.log(f'{title}: {time.perf_counter() - start:.1f} с')
+
+    def insert(self, model, objects, **kwargs):
+        """
+        bulk_create потоком пачек: в памяти не больше batch_size
+        объектов. Django 2.2 сам не урезает batch_size под лимит
+        переменных и составных SELECT в SQLite.
+        """
+        fields = model._meta.concrete_fields
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return
+            limit = connection.ops.bulk_batch_size(fields, batch)
+            model.objects.bulk_create(batch, batch_size=limit, **kwargs)
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def moment(self):
+        return self.now - timedelta(
+            seconds=self.rng.randrange(SEED_DAYS * 24 * 60 * 60)
+        )
+
+    def ranked(self, pks):
+        """Объекты в случайном порядке популярности: первый - самый."""
+        ranked = list(pks)
+        self.rng.shuffle(ranked)
+        return ranked
+
+    @transaction.atomic
+    def run(self, users, groups, posts, comments, follows, images=0):
+        """
+        Одни и те же авторы и пишут больше всех, и собирают
+        больше всех подписчиков; крутизну перекоса задают
+        posts_exponent и follows_exponent (0 - равномерно).
+        """
+        with self.stage('Пользователи'):
+            user_pks = self.create_users(users)
+        with self.stage('Группы'):
+            group_pks = self.create_groups(groups)
+        with self.stage('Картинки'):
+            pool = self.create_images(images)
+        authors = self.ranked(user_pks)
+        with self.stage('Посты'):
+            post_pks = self.create_posts(posts, authors, group_pks, pool)
+        with self.stage('Комментарии'):
+            self.create_comments(comments, post_pks, user_pks)
+        with self.stage('Подписки'):
+            self.create_follows(follows, authors, user_pks)
+        with self.stage('Ленты и счётчики'):
+            self.rebuild_derived(user_pks)
+
+    def create_users(self, count):
+        start = last_pk(User)
+        # Хэш пароля считается один раз: PBKDF2 на каждого
+        # пользователя занял бы больше времени, чем всё остальное.
+        password = make_password(self.password)
+        self.insert(
+            User,
+            (
+                User(
+                    username=f'{SEED_USERNAME}{start + number}',
+                    password=password,
+                )
+                for number in range(count)
+            ),
+        )
+        return new_pks(User, start)
+
+    def create_groups(self, count):
+        start = last_pk(Group)
+        self.insert(
+            Group,
+            (
+                Group(
+                    title=self.text(1, 3),
+                    slug=f'{SEED_USERNAME}-{start + number}',
+                    description=self.text(5, 20),
+                )
+                for number in range(count)
+            ),
+        )
+        return new_pks(Group, start)
+
+    def create_images(self, count):
+        """
+        Небольшой набор картинок в хранилище постов. Одноцветные
+        картинки одного цвета совпадут по хэшу и сохранятся один раз.
+        Миниатюры не создаются: для них есть warm_thumbnails.
+        """
+        names = set()
+        for _ in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', SEED_IMAGE_SIZE, color).save(buffer, 'JPEG')
+            names.add(image_storage.save(
+                f'{Post.image.field.upload_to}{SEED_USERNAME}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return sorted(names)
+
+    def image(self, pool, refs):
+        if not pool or self.rng.random() >= self.image_ratio:
+            return ''
+        name = self.rng.choice(pool)
+        refs[name] += 1
+        return name
+
+    def create_posts(self, count, authors, group_pks, pool=()):
+        start = last_pk(Post)
+        weights = zipf_weights(len(authors), self.posts_exponent)
+        groups = list(group_pks) + [None] * len(group_pks)
+        refs = Counter()
+        with explicit_dates(Post, 'pub_date'):
+            self.insert(
+                Post,
+                (
+                    Post(
+                        author_id=author_pk,
+                        group_id=self.rng.choice(groups) if groups else None,
+                        text=self.text(5, 80),
+                        pub_date=self.moment(),
+                        image=self.image(pool, refs),
+                    )
+                    for author_pk in self.rng.choices(
+                        authors, weights, k=count
+                    )
+                ),
+            )
+        for name, count in refs.items():
+            ImageBlob.objects.get_or_create(name=name)
+            ImageBlob.objects.filter(name=name).update(refs=F('refs') + count)
+        return new_pks(Post, start)
+
+    def create_comments(self, count, post_pks, user_pks):
+        if not post_pks:
+            return
+        posts = self.ranked(post_pks)
+        weights = zipf_weights(len(posts))
+        with explicit_dates(Comment, 'created'):
+            self.insert(
+                Comment,
+                (
+                    Comment(
+                        post_id=post_pk,
+                        author_id=self.rng.choice(user_pks),
+                        text=self.text(1, 30),
+                        created=self.moment(),
+                    )
+                    for post_pk in self.rng.choices(posts, weights, k=count)
+                ),
+            )
+
+    def create_follows(self, average, authors, user_pks):
+        """
+        В среднем average подписок на пользователя. Подписчиков
+        получают в основном популярные авторы, а подписываются
+        чаще всего самые активные читатели.
+        """
+        author_weights = zipf_weights(len(authors), self.follows_exponent)
+        readers = self.ranked(user_pks)
+        reader_weights = zipf_weights(len(readers), self.follows_exponent)
+        pairs = set()
+        target = average * len(user_pks)
+        # Пары повторяются и совпадают с самоподписками, поэтому
+        # недостающие добираются несколькими раундами.
+        for _ in range(SEED_FOLLOW_ROUNDS):
+            missing = target - len(pairs)
+            if missing <= 0:
+                break
+            pairs.update(
+                (user_pk, author_pk)
+                for user_pk, author_pk in zip(
+                    self.rng.choices(readers, reader_weights, k=missing),
+                    self.rng.choices(authors, author_weights, k=missing),
+                )
+                if user_pk != author_pk
+            )
+        self.insert(
+            Follow,
+            (Follow(user_id=user, author_id=author) for user, author in pairs),
+            ignore_conflicts=True,
+        )
+
+    def rebuild_derived(self, user_pks):
+        """
+        bulk_create не вызывает сигналы, поэтому ленты подписок,
+        счётчики и поколение кэша ленты пересчитываются отдельно.
+        """
+        cache.delete(CELEBRITY_CACHE_KEY)
+        self.fill_timelines(user_pks)
+        call_command('reconcile_stats', stdout=StringIO())
+        bump_feed_generation()
+
+    def fill_timelines(self, user_pks):
+        """
+        Ленты новых пользователей по тем же правилам, что
+        backfill_author: без знаменитостей и не длиннее TIMELINE_LENGTH.
+        Записей порядка пользователи * TIMELINE_LENGTH, поэтому
+        лента собирается слиянием уже упорядоченных постов авторов
+        и пишется сырыми пачками, а не объектами моделей.
+        """
+        with connection.cursor() as db:
+            db.execute(RECENT_POSTS_SQL.format(post=Post._meta.db_table))
+            recent = defaultdict(list)
+            for author_pk, pub_date, pk in db:
+                posts = recent[author_pk]
+                if len(posts) < TIMELINE_LENGTH:
+                    posts.append((pub_date, pk))
+            entries = self.timeline_entries(user_pks, recent)
+            sql = INSERT_TIMELINE_SQL.format(timeline=Timeline._meta.db_table)
+            while True:
+                batch = list(islice(entries, self.batch_size))
+                if not batch:
+                    return
+                db.executemany(sql, batch)
+
+    def timeline_entries(self, user_pks, recent):
+        if not user_pks:
+            return
+        celebrities = celebrity_ids()
+        follows = (
+            Follow.objects.filter(
+                user_id__gte=user_pks[0], user_id__lte=user_pks[-1]
+            )
+            .exclude(author_id__in=celebrities)
+            .order_by('user_id')
+            .values_list('user_id', 'author_id')
+            .iterator()
+        )
+        for user_pk, pairs in groupby(follows, itemgetter(0)):
+            newest = heapq.merge(
+                *(recent[author_pk] for _, author_pk in pairs), reverse=True
+            )
+            for pub_date, pk in islice(newest, TIMELINE_LENGTH):
+                yield user_pk, pub_date, pk
@@ -0,0 +1,122 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .comment_cache import refresh_latest
+from .feed_cache import bump_feed_generation, touch_feed_modified
+from .images import acquire_image, release_image
+from .models import Comment, Follow, Post
+from .stats import bump_group, bump_post_comments, bump_user
+from .thumbnails import schedule_on_commit
+from .timeline import (backfill_author, fan_out_post, remove_author,
+                       update_celebrity)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_previous(sender, instance, **kwargs):
+    """Запоминает прежние группу и картинку поста перед редактированием."""
+    if not instance._state.adding:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    """Новый пост попадает в ленты подписчиков автора."""
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_bump_feed(sender, instance, **kwargs):
+    """Любое изменение поста делает кэш ленты неактуальным."""
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Post)
+def post_schedule_thumbnail(sender, instance, created, **kwargs):
+    """Миниатюры новой картинки создаются в фоне сразу после сохранения."""
+    previous_image = '' if created else getattr(
+        instance, '_previous_image', ''
+    )
+    if instance.image and instance.image.name != previous_image:
+        schedule_on_commit(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def post_count_image(sender, instance, created, **kwargs):
+    """Учитывает ссылки постов на общие файлы картинок."""
+    previous_image = '' if created else getattr(
+        instance, '_previous_image', instance.image.name
+    )
+    if previous_image != instance.image.name:
+        acquire_image(instance.image.name)
+        release_image(previous_image)
+
+
+@receiver(post_delete, sender=Post)
+def post_release_image(sender, instance, **kwargs):
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def post_update_stats(sender, instance, created, **kwargs):
+    """Обновляет счётчики постов автора и группы."""
+    if created:
+        bump_user(instance.author_id, 'posts_count', 1)
+        bump_group(instance.group_id, 'posts_count', 1)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        bump_group(previous_group_id, 'posts_count', -1)
+        bump_group(instance.group_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_delete_stats(sender, instance, **kwargs):
+    bump_user(instance.author_id, 'posts_count', -1)
+    bump_group(instance.group_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_update_post(sender, instance, created, **kwargs):
+    """
+    Новый комментарий увеличивает счётчик поста и обновляет снимок
+    последних комментариев. Кэш страниц ленты хранит только id постов,
+    а ключ карточки берёт версию из снимка, поэтому поколение ленты
+    не меняется.
+    """
+    if created:
+        bump_post_comments(instance.post_id, 1)
+        refresh_latest(instance.post_id)
+        touch_feed_modified()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_delete_post(sender, instance, **kwargs):
+    bump_post_comments(instance.post_id, -1)
+    refresh_latest(instance.post_id)
+    touch_feed_modified()
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    """После подписки в ленту добавляются посты автора."""
+    if created:
+        backfill_author(instance.user_id, instance.author_id)
+        bump_user(instance.author_id, 'followers_count', 1)
+        bump_user(instance.user_id, 'following_count', 1)
+        update_celebrity(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_cleanup(sender, instance, **kwargs):
+    """После отписки посты автора убираются из ленты."""
+    remove_author(instance.user_id, instance.author_id)
+    bump_user(instance.author_id, 'followers_count', -1)
+    bump_user(instance.user_id, 'following_count', -1)
+    # Статус знаменитости читает уже обновлённый счётчик подписчиков.
+    update_celebrity(instance.author_id)
@@ -0,0 +1,80 @@
+from django.db.models import F
+
+from .models import Follow, GroupStats, Post, UserStats
+
+
+def _bump(model, pk, field, delta):
+    """
+    Атомарно сдвигает счётчик через F().
+    Отсутствующую строку не создаёт: её посчитает user_stats/group_stats
+    при первом чтении или команда reconcile_stats.
+    """
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    rows.update(**{field: F(field) + delta})
+
+
+def bump_user(user_id, field, delta):
+    _bump(UserStats, user_id, field, delta)
+
+
+def bump_group(group_id, field, delta):
+    if group_id is not None:
+        _bump(GroupStats, group_id, field, delta)
+
+
+def bump_post_comments(post_id, delta):
+    if post_id is not None:
+        _bump(Post, post_id, 'comment_count', delta)
+
+
+def count_user(user_id):
+    """Считает счётчики пользователя по исходным таблицам."""
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def count_group(group_id):
+    """Считает счётчики группы по исходным таблицам."""
+    return {'posts_count': Post.objects.filter(group_id=group_id).count()}
+
+
+def followers_count(user_id):
+    """
+    Число подписчиков из денормализованного счётчика. Пока строки
+    счётчиков нет, оно считается по таблице подписок.
+    """
+    count = UserStats.objects.filter(user_id=user_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if count is None:
+        count = Follow.objects.filter(author_id=user_id).count()
+    return count
+
+
+def user_stats(user):
+    """Возвращает счётчики пользователя, создавая строку при отсутствии."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        stats, _ = UserStats.objects.get_or_create(
+            user=user, defaults=count_user(user.pk)
+        )
+        user.stats = stats
+        return stats
+
+
+def group_stats(group):
+    """Возвращает счётчики группы, создавая строку при отсутствии."""
+    try:
+        return group.stats
+    except GroupStats.DoesNotExist:
+        stats, _ = GroupStats.objects.get_or_create(
+            group=group, defaults=count_group(group.pk)
+        )
+        group.stats = stats
+        return stats
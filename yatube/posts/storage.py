@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .constants import IMAGE_HASH_SHARDS, IMAGE_LOCK_NAME
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_reused = threading.local()
+
+# Имя, которое уже выдано хранилищем: шарды и sha256 в hex.
+HASHED_NAME = re.compile(
+    r'(^|/)([0-9a-f]{2}/){%d}[0-9a-f]{64}(\.\w+)?$' % IMAGE_HASH_SHARDS
+)
+
+
+def content_hash(content):
+    """sha256 содержимого файла, читается по частям."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, content):
+    """
+    Имя файла по содержимому: каталог upload_to, шардирующие
+    подкаталоги из первых символов хэша и расширение исходного файла.
+    posts/cat.gif -> posts/ab/cd/abcd...ef.gif
+    """
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    digest = content_hash(content)
+    shards = [
+        digest[index * 2:index * 2 + 2]
+        for index in range(IMAGE_HASH_SHARDS)
+    ]
+    return '/'.join([directory, *shards, digest + extension]).lstrip('/')
+
+
+def is_hashed_name(name):
+    return HASHED_NAME.search(name) is not None
+
+
+@contextmanager
+def image_lock(storage):
+    """
+    Блокировка файлов картинок для потоков и процессов машины:
+    повторная загрузка существующего файла и удаление файла без
+    ссылок не должны перемежаться.
+    """
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(storage.location, exist_ok=True)
+        path = os.path.join(storage.location, IMAGE_LOCK_NAME)
+        with open(path, 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла - хэш его содержимого.
+    Одинаковые картинки разных постов лежат в одном файле,
+    а sorl строит для них одну миниатюру, так как ключ миниатюры -
+    имя исходника. Удалением файлов управляет posts.images.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content)
+        with image_lock(self):
+            if self.exists(name):
+                # Свежее время изменения защищает файл от gc_media,
+                # пока новый пост с этой картинкой не сохранён.
+                os.utime(self.path(name))
+                # Ссылку пост возьмёт позже, а последнюю прежнюю ссылку
+                # могут как раз освобождать: содержимое нужно restore.
+                _reused.name, _reused.content = name, content
+                return name
+        return self._save(name, content)
+
+    def restore(self, name):
+        """
+        Возвращает файл повторной загрузки, если его удалили, пока
+        ссылка нового поста ещё не была зафиксирована.
+        """
+        if getattr(_reused, 'name', None) != name:
+            return
+        content = _reused.content
+        _reused.name = _reused.content = None
+        with image_lock(self):
+            if self.exists(name):
+                return
+            try:
+                content.seek(0)
+                self._save(name, content)
+            except (OSError, ValueError):
+                logger.exception('Не удалось восстановить картинку %s', name)
+
+
+image_storage = ContentAddressedStorage()
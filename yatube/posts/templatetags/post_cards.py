@@ -0,0 +1,14 @@
+from django import template
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, latest=None):
+    """
+    Возвращает отрисованные карточки постов страницы.
+    latest - снимки комментариев, если представление их уже достало.
+    """
+    return render_cards(context.get('request'), posts, latest)
@@ -0,0 +1,30 @@
+import logging
+
+from django import template
+
+from ..thumbnails import ResponsiveImage, responsive_thumbnail
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    """
+    Миниатюра картинки поста во всех размерах и форматах
+    без ожидания её генерации. Пока варианты создаются в фоне,
+    отдаётся оригинал, а пост помечается thumbnail_pending,
+    чтобы карточку не кэшировать.
+    """
+    if not image:
+        return None
+    try:
+        thumbnail = responsive_thumbnail(image)
+    except Exception:
+        # Как и тег thumbnail из sorl, не роняем страницу из-за картинки.
+        logger.exception('Не удалось получить миниатюру %s', image)
+        return None
+    if thumbnail is not None:
+        return thumbnail
+    image.instance.thumbnail_pending = True
+    return ResponsiveImage(image.url)
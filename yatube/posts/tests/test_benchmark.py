@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..benchmark import SCENARIOS, Dataset, run_scenario
+from ..constants import FEED_GENERATION_KEY
+from ..management.commands.benchmark import benchmark_caches
+from ..models import (Comment, Follow, ImageBlob, Post, Timeline, User,
+                      UserStats)
+from ..seeding import Seeder
+from ..storage import image_storage
+from ..timeline import rebuild_timeline
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SeedingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Seeder(seed=1, batch_size=50).run(
+            users=30, groups=3, posts=200, comments=300, follows=4
+        )
+
+    def test_seeded_counts(self):
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertGreater(Follow.objects.count(), 30)
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 200
+        )
+
+    def test_derived_data_matches_signals(self):
+        """Ленты и счётчики такие же, как после обычных сохранений."""
+        user = Follow.objects.values_list('user', flat=True).first()
+        seeded = set(
+            Timeline.objects.filter(user=user).values_list('post', flat=True)
+        )
+        rebuild_timeline(user)
+        self.assertSetEqual(
+            seeded,
+            set(
+                Timeline.objects.filter(user=user)
+                .values_list('post', flat=True)
+            ),
+        )
+        stats = UserStats.objects.get(user=user)
+        self.assertEqual(
+            stats.following_count, Follow.objects.filter(user=user).count()
+        )
+
+    def test_scenarios_run_without_errors(self):
+        dataset = Dataset()
+        for name in SCENARIOS:
+            with self.subTest(name):
+                result = run_scenario(name, dataset, 5, 1)
+                self.assertEqual(result['requests'], 5)
+                self.assertEqual(result['errors'], 0)
+
+
+class BenchmarkCacheTests(TestCase):
+    def test_benchmark_cache_isolated(self):
+        """Замер не читает и не пишет ключи кэша работающего сайта."""
+        cache.set(FEED_GENERATION_KEY, 'сайт')
+        with override_settings(CACHES=benchmark_caches('index')):
+            self.assertIsNone(cache.get(FEED_GENERATION_KEY))
+            cache.set(FEED_GENERATION_KEY, 'замер')
+            cache.clear()
+        self.assertEqual(cache.get(FEED_GENERATION_KEY), 'сайт')
+        with override_settings(CACHES=benchmark_caches('index')):
+            self.assertIsNone(cache.get(FEED_GENERATION_KEY))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_images_from_pool(self):
+        """Картинки постов берутся из набора, ссылки на них учтены."""
+        call_command(
+            'seed',
+            users=10,
+            groups=2,
+            posts=40,
+            comments=10,
+            follows=2,
+            images=2,
+            image_ratio=0.5,
+            stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 10)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertLessEqual(ImageBlob.objects.count(), 2)
+        for blob in ImageBlob.objects.all():
+            self.assertTrue(image_storage.exists(blob.name))
+            self.assertEqual(
+                blob.refs, Post.objects.filter(image=blob.name).count()
+            )
@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..page_cache import page_key
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def test_not_modified(self):
+        """С совпавшим If-None-Match страница отдаёт 304 без тела."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user(self):
+        """Гость и автор получают разные ETag, ответ зависит от Cookie."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.guest_client.get(url)
+                author = self.authorized_client.get(url)
+                self.assertNotEqual(guest['ETag'], author['ETag'])
+                self.assertIn('Cookie', guest['Vary'])
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=guest['ETag']
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_content(self):
+        """Новый пост и новый комментарий меняют ETag страниц."""
+        etags = [self.guest_client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_follows_newest_comment(self):
+        """
+        Удалённый и новый комментарий оставляют счётчик прежним,
+        но меняют ETag страницы поста.
+        """
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text='Старый комментарий'
+        )
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        etag = self.guest_client.get(url)['ETag']
+        comment.delete()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_detail_etag_follows_csrf_token(self):
+        """
+        После смены CSRF-токена (новый вход) страница поста с формой
+        комментария отдаётся заново, а не 304 со старым токеном.
+        """
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.authorized_client.get(url)
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = (
+            _get_new_csrf_token()
+        )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_last_modified(self):
+        """Главная отдаёт Last-Modified и отвечает на If-Modified-Since."""
+        Post.objects.create(author=self.author, text='Новый пост')
+        url = reverse('posts:index')
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_page_without_validators(self):
+        """Устаревшую страницу из кэша фрагментов нельзя закрепить ETag."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Новый пост')
+        key = page_key('index_page', (None, None))
+        cache.add(f'posts:page-lock:{key}', 1)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
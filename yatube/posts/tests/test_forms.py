@@ -3,16 +3,20 @@ import tempfile
 from http import HTTPStatus
 
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Comment, Group, Post, User
+from ..storage import hashed_name
+from .utils import sync_thumbnails
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@sync_thumbnails
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -84,7 +88,10 @@ class PostFormTests(TestCase):
         self.assertEqual(post_upd[0].text, form_data['text'])
         self.assertEqual(post_upd[0].group.id, form_data['group'])
         self.assertEqual(post_upd[0].author, form_data['author'])
-        self.assertEqual(post_upd[0].image, 'posts/new_small.gif')
+        self.assertEqual(
+            post_upd[0].image,
+            hashed_name('posts/new_small.gif', ContentFile(self.small_gif))
+        )
 
     def test_post_edit(self):
         """Проверка формы изменения записи и валидность."""
@@ -118,7 +125,9 @@ class PostFormTests(TestCase):
                 author=self.user,
                 group=self.new_group,
                 id=self.post.id,
-                image='posts/new_big.gif'
+                image=hashed_name(
+                    'posts/new_big.gif', ContentFile(self.small_gif)
+                )
             ).exists()
         )
 
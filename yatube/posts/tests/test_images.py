@@ -0,0 +1,222 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+
+from ..models import ImageBlob, Post, User
+from ..storage import image_storage, is_hashed_name
+from ..thumbnails import generate_thumbnail, ready_thumbnail, source_file
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+THIRD_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\x00\xFF')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.schedule_thumbnail')
+@mock.patch('posts.images.transaction.on_commit', lambda func: func())
+class ContentAddressedImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name=name, content=content, content_type='image/gif'
+            ),
+        )
+
+    def test_identical_images_share_file(self, schedule_thumbnail):
+        """Одинаковые картинки хранятся в одном файле с именем по хэшу."""
+        first = self.create_post(SMALL_GIF, 'first.gif')
+        second = self.create_post(SMALL_GIF, 'second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(is_hashed_name(first.image.name))
+        self.assertEqual(ImageBlob.objects.get(name=first.image.name).refs, 2)
+        directory = image_storage.path(first.image.name).rsplit('/', 1)[0]
+        _, files = image_storage.listdir(directory)
+        self.assertEqual(len(files), 1)
+
+    def test_file_removed_with_last_reference(self, schedule_thumbnail):
+        """Файл удаляется только вместе с последним постом."""
+        first = self.create_post(SMALL_GIF)
+        second = self.create_post(SMALL_GIF)
+        name = first.image.name
+        first.delete()
+        self.assertTrue(image_storage.exists(name))
+        second.delete()
+        self.assertFalse(image_storage.exists(name))
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+    def test_reupload_survives_concurrent_release(self, schedule_thumbnail):
+        """
+        Повторная загрузка файла, последнюю ссылку на который
+        освобождают до фиксации нового поста, не теряет файл.
+        """
+        first = self.create_post(SMALL_GIF)
+        name = image_storage.save('posts/again.gif', ContentFile(SMALL_GIF))
+        self.assertEqual(name, first.image.name)
+        first.delete()
+        self.assertFalse(image_storage.exists(name))
+        second = Post.objects.create(
+            author=self.user, text='Тот же файл', image=name
+        )
+        self.assertTrue(image_storage.exists(second.image.name))
+        self.assertEqual(ImageBlob.objects.get(name=name).refs, 1)
+
+    def test_replaced_image_released(self, schedule_thumbnail):
+        """Замена картинки при редактировании освобождает старый файл."""
+        post = self.create_post(SMALL_GIF)
+        old_name = post.image.name
+        post.image = SimpleUploadedFile(
+            name='other.gif', content=OTHER_GIF, content_type='image/gif'
+        )
+        post.save()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(image_storage.exists(old_name))
+        self.assertEqual(ImageBlob.objects.get(name=post.image.name).refs, 1)
+
+    def test_dedupe_legacy_images(self, schedule_thumbnail):
+        """dedupe_images сливает старые копии одной картинки в один файл."""
+        legacy_storage = FileSystemStorage()
+        names = [
+            legacy_storage.save('posts/small.gif', ContentFile(SMALL_GIF))
+            for _ in range(2)
+        ]
+        posts = [
+            Post.objects.create(
+                author=self.user, text='Старый пост', image=name
+            )
+            for name in names
+        ]
+        call_command('dedupe_images', stdout=StringIO())
+        new_names = {
+            post.image.name for post in Post.objects.filter(
+                pk__in=[post.pk for post in posts]
+            )
+        }
+        self.assertEqual(len(new_names), 1)
+        new_name = new_names.pop()
+        self.assertTrue(is_hashed_name(new_name))
+        self.assertEqual(ImageBlob.objects.get(name=new_name).refs, 2)
+        for name in names:
+            self.assertFalse(legacy_storage.exists(name))
+            self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.schedule_thumbnail')
+class GarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        self.thumbnail = generate_thumbnail(self.post.image.name)
+        ready_thumbnail(self.post.image)
+        orphan_name = image_storage.save(
+            'posts/orphan.gif', ContentFile(OTHER_GIF)
+        )
+        self.orphan = generate_thumbnail(orphan_name)
+        ready_thumbnail(orphan_name)
+        self.orphan_name = orphan_name
+
+    def gc_media(self, *args):
+        out = StringIO()
+        call_command('gc_media', '--min-age=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_keeps_files(self, schedule_thumbnail):
+        """--dry-run только считает освобождаемые байты."""
+        size = (
+            image_storage.size(self.orphan_name)
+            + image_storage.size(self.orphan.name)
+        )
+        output = self.gc_media('--dry-run')
+        self.assertIn('оригиналов 1, миниатюр 1', output)
+        self.assertIn(f'освобождается байт: {size}', output)
+        self.assertTrue(image_storage.exists(self.orphan_name))
+        self.assertTrue(image_storage.exists(self.orphan.name))
+
+    def test_orphans_removed(self, schedule_thumbnail):
+        """Удаляются только картинки без постов и их миниатюры."""
+        self.gc_media()
+        self.assertFalse(image_storage.exists(self.orphan_name))
+        self.assertFalse(image_storage.exists(self.orphan.name))
+        self.assertIsNone(default.kvstore.get(source_file(self.orphan_name)))
+        self.assertTrue(image_storage.exists(self.post.image.name))
+        self.assertTrue(image_storage.exists(self.thumbnail.name))
+        self.assertIsNotNone(default.kvstore.get(self.thumbnail))
+
+    def test_post_created_during_walk_keeps_blob(self, schedule_thumbnail):
+        """
+        Пост, созданный после снимка имён, но до удаления записей,
+        сохраняет счётчик ссылок своего файла.
+        """
+        created = []
+
+        def create_post(keys):
+            created.append(Post.objects.create(
+                author=self.user,
+                text='Пост во время обхода',
+                image=SimpleUploadedFile(
+                    name='new.gif', content=THIRD_GIF, content_type='image/gif'
+                ),
+            ))
+            return len(keys)
+
+        with mock.patch(
+            'posts.management.commands.gc_media.Command.delete_keys',
+            side_effect=create_post,
+        ):
+            output = self.gc_media()
+        self.assertIn('записей ImageBlob 0', output)
+        self.assertEqual(
+            ImageBlob.objects.get(name=created[0].image.name).refs, 1
+        )
+
+    def test_fresh_files_kept(self, schedule_thumbnail):
+        """Свежие файлы не трогаются: их пост может быть не сохранён."""
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(image_storage.exists(self.orphan_name))
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.cache import SQLiteCache
+
+from ..feed_cache import feed_generation
+from ..models import Comment, Group, Post, User
+from ..page_cache import cached_fragment, page_key
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.key = page_key('index_page', [None, None])
+
+    def test_fresh_fragment_not_recomputed(self):
+        compute = mock.Mock(return_value='страница')
+        for _ in range(2):
+            value = cached_fragment(self.key, 'v1', compute, 60)
+            self.assertEqual(value, 'страница')
+        compute.assert_called_once()
+
+    def test_new_version_recomputed(self):
+        cached_fragment(self.key, 'v1', lambda: 'старая', 60)
+        value = cached_fragment(self.key, 'v2', lambda: 'новая', 60)
+        self.assertEqual(value, 'новая')
+
+    def test_stale_served_while_recomputing(self):
+        """Пока фрагмент пересчитывает другой запрос, отдаётся прежний."""
+        cached_fragment(self.key, 'v1', lambda: 'старая', 60)
+        cache.add(f'posts:page-lock:{self.key}', 1)
+        compute = mock.Mock(return_value='новая')
+        value = cached_fragment(self.key, 'v2', compute, 60)
+        self.assertEqual(value, 'старая')
+        compute.assert_not_called()
+
+    def test_single_flight(self):
+        """Одновременные промахи считают фрагмент один раз."""
+        with tempfile.TemporaryDirectory() as directory:
+            shared = SQLiteCache(
+                os.path.join(directory, 'cache.sqlite3'), {}
+            )
+            calls = []
+            results = []
+
+            def compute():
+                calls.append(1)
+                time.sleep(0.2)
+                return 'страница'
+
+            def request():
+                results.append(cached_fragment(self.key, 'v1', compute, 60))
+
+            with mock.patch('posts.page_cache.cache', shared):
+                threads = [
+                    threading.Thread(target=request) for _ in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['страница'] * 8)
+
+
+class FeedPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+
+    def test_warm_index_without_queries(self):
+        """Тёплая главная собирается из кэша без запросов к базе."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, self.post.text)
+
+    def test_comment_keeps_generation(self):
+        """
+        Комментарий не сбрасывает кэш страниц ленты, но карточка
+        поста показывает его сразу.
+        """
+        for url in self.urls:
+            self.client.get(url)
+        generation = feed_generation()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий'
+        )
+        self.assertEqual(feed_generation(), generation)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Комментариев: 1')
+                self.assertContains(response, 'Свежий комментарий')
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from ..constants import LIMIT_COMMENTS, LIMIT_POST
+from ..models import Comment, Follow, Group, Post, User
+from ..stats import user_stats
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        user_stats(cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, count):
+        posts = mixer.cycle(count).blend(
+            Post, author=self.author, group=self.group, image=''
+        )
+        for post in posts:
+            mixer.cycle(2).blend(Comment, post=post, author=self.reader)
+        return posts
+
+    def urls(self, post):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_posts': reverse(
+                'posts:group_posts', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            ),
+            'posts:post_comments': reverse(
+                'posts:post_comments', kwargs={'post_id': post.pk}
+            ),
+        }
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_query_budget_does_not_grow_with_page(self):
+        """
+        Число запросов каждой страницы не зависит от числа постов
+        и комментариев и укладывается в бюджет.
+        """
+        post = self.create_posts(1)[0]
+        few = {
+            name: self.count_queries(url)
+            for name, url in self.urls(post).items()
+        }
+        self.create_posts(LIMIT_POST)
+        mixer.cycle(LIMIT_COMMENTS * 2).blend(
+            Comment, post=post, author=self.reader
+        )
+        for name, url in self.urls(post).items():
+            with self.subTest(name):
+                queries = self.count_queries(url)
+                self.assertEqual(queries, few[name])
+                self.assertLessEqual(queries, settings.QUERY_BUDGETS[name])
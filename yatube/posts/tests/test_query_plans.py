@@ -0,0 +1,78 @@
+import re
+import unittest
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from ..constants import LIMIT_COMMENTS
+from ..models import Follow, Group, Post, User
+from ..timeline import timeline_posts
+from ..utils import feed_posts, post_comments
+
+# Полный проход по таблице: «SCAN posts_post» без «USING INDEX».
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+# Лента подписок сортирует не больше TIMELINE_LENGTH записей
+# плюс посты знаменитостей, поэтому сортировка в памяти допустима.
+BOUNDED_SORTS = ('posts:follow_index',)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN')
+class QueryPlanTests(TestCase):
+    """
+    Проверка планов горячих запросов через EXPLAIN QUERY PLAN.
+    Тест падает, если запрос страницы читает таблицу целиком
+    или сортирует неограниченную выборку во временном B-дереве.
+    Это значит, что для нового фильтра или сортировки не хватает
+    индекса в Meta.indexes модели.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_hot_queries_use_indexes(self):
+        """Запросы страниц идут по индексам."""
+        queries = {
+            'posts:index': feed_posts(Post.objects.all())[:10],
+            'posts:group_posts': feed_posts(self.group.posts.all())[:10],
+            'posts:profile': feed_posts(self.author.posts.all())[:10],
+            'posts:follow_index': feed_posts(
+                timeline_posts(self.reader)
+            )[:10],
+            'posts:post_detail': post_comments(self.post).order_by(
+                '-created', '-pk'
+            )[:LIMIT_COMMENTS],
+            'posts:post_comments': post_comments(self.post).filter(
+                Q(created__lt=self.post.pub_date)
+                | Q(created=self.post.pub_date, pk__lt=1)
+            ).order_by('-created', '-pk')[:LIMIT_COMMENTS],
+            'followers': Follow.objects.filter(
+                author=self.author
+            ).values_list('user_id', flat=True),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                plan = self.query_plan(queryset)
+                for step in plan:
+                    self.assertIsNone(FULL_SCAN.match(step), plan)
+                if name not in BOUNDED_SORTS:
+                    self.assertNotIn(TEMP_SORT, plan)
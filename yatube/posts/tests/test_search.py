@@ -0,0 +1,101 @@
+import unittest
+
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import filter_matching, search
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'FTS5 только в SQLite')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Поход в горы <b>летом</b>'
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Рецепт борща'
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.user, post=cls.other_post, text='Лучше идти в горы'
+        )
+
+    def test_search_posts_and_comments(self):
+        """Поиск находит совпадения в постах и комментариях."""
+        results = list(search('горы'))
+        self.assertEqual(
+            {(result.post, result.is_comment) for result in results},
+            {(self.post, False), (self.other_post, True)},
+        )
+
+    def test_snippet_is_escaped(self):
+        """Текст фрагмента экранируется, подсвечиваются только слова."""
+        result = list(search('летом'))[0]
+        self.assertIn('<mark>летом</mark>', result.snippet)
+        self.assertIn('&lt;b&gt;', result.snippet)
+
+    def test_index_follows_changes(self):
+        """Правка и удаление поста попадают в индекс."""
+        posts = Post.objects.all()
+        url = reverse('posts:search')
+        Post.objects.filter(pk=self.post.pk).update(text='Поход на море')
+        self.assertNotIn(self.post, filter_matching(posts, 'горы'))
+        self.assertEqual(list(filter_matching(posts, 'море')), [self.post])
+        self.assertContains(
+            Client().get(url, {'q': 'море'}), '<mark>море</mark>'
+        )
+        Post.objects.filter(pk=self.post.pk).delete()
+        self.assertFalse(filter_matching(posts, 'море').exists())
+        self.assertNotContains(
+            Client().get(url, {'q': 'море'}), '<mark>море</mark>'
+        )
+
+    def test_special_characters(self):
+        """Спецсимволы FTS5 в запросе не ломают поиск."""
+        self.assertEqual(len(search('"горы* OR (')), 0)
+
+    def test_cursor_pagination(self):
+        """Выдача листается по курсору без повторов."""
+        first_page = search('горы', limit=1)
+        second_page = search('горы', first_page.next_cursor, limit=1)
+        self.assertIsNotNone(first_page.next_cursor)
+        self.assertIsNone(second_page.next_cursor)
+        self.assertNotEqual(
+            list(first_page)[0].post, list(second_page)[0].post
+        )
+
+    def test_search_page(self):
+        """Страница поиска выводит результаты."""
+        response = Client().get(reverse('posts:search'), {'q': 'борща'})
+        self.assertContains(response, '<mark>борща</mark>')
+
+    def test_admin_search(self):
+        """Поиск в админке идёт по индексу FTS5."""
+        queryset, use_distinct = site._registry[Post].get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'борща'
+        )
+        self.assertEqual(list(queryset), [self.other_post])
+        self.assertFalse(use_distinct)
+        self.assertIn('MATCH', str(queryset.query))
+
+    def test_admin_search_subquery(self):
+        """
+        Совпадения отбираются подзапросом, а не списком id:
+        частое слово не упирается в лимит переменных SQLite.
+        """
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='горы') for _ in range(50)]
+        )
+        queryset, _ = site._registry[Post].get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'горы'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(queryset.count(), 51)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('IN (SELECT post_id', queries[0]['sql'])
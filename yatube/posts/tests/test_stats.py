@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..comment_cache import latest_comments
+from ..constants import LATEST_COMMENTS
+from ..models import (Comment, Follow, Group, GroupStats, Post, User,
+                      UserStats)
+from ..stats import group_stats, user_stats
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.new_group = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test2',
+            description='Тестовое описание 2',
+        )
+
+    def setUp(self):
+        cache.clear()
+        for user in User.objects.all():
+            user_stats(user)
+        for group in Group.objects.all():
+            group_stats(group)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def group_posts(self, group):
+        return GroupStats.objects.get(group=group).posts_count
+
+    def test_post_counters(self):
+        """Счётчики постов меняются при создании, правке и удалении."""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост'
+        )
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.group_posts(self.group), 1)
+        post.group = self.new_group
+        post.save()
+        self.assertEqual(self.group_posts(self.group), 0)
+        self.assertEqual(self.group_posts(self.new_group), 1)
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.group_posts(self.new_group), 0)
+
+    def test_follow_counters(self):
+        """Счётчики подписок меняются при подписке и отписке."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_comment_counters(self):
+        """
+        Комментарии меняют счётчик поста и снимок последних
+        комментариев, которые карточка ленты берёт из кэша.
+        """
+        post = Post.objects.create(author=self.author, text='Пост')
+        comments = [
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {number}'
+            )
+            for number in range(LATEST_COMMENTS + 1)
+        ]
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, LATEST_COMMENTS + 1)
+        with self.assertNumQueries(0):
+            latest = latest_comments([post])[post.pk]
+        self.assertEqual(latest['count'], LATEST_COMMENTS + 1)
+        self.assertEqual(
+            [comment['id'] for comment in latest['comments']],
+            [comment.pk for comment in comments[::-1][:LATEST_COMMENTS]],
+        )
+        comments[-1].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, LATEST_COMMENTS)
+        cache.clear()
+        with self.assertNumQueries(1):
+            latest = latest_comments([post])[post.pk]
+        self.assertEqual(latest['count'], LATEST_COMMENTS)
+        self.assertEqual(latest['comments'][0]['text'], comments[-2].text)
+        self.assertEqual(
+            latest['comments'][0]['author'], self.reader.username
+        )
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, f'Комментариев: {LATEST_COMMENTS}')
+        self.assertContains(response, comments[-2].text)
+
+    def test_reconcile_stats(self):
+        """Команда reconcile_stats исправляет расхождения."""
+        Post.objects.create(author=self.author, group=self.group, text='Пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.filter(user=self.author).update(
+            posts_count=10, followers_count=0
+        )
+        GroupStats.objects.all().delete()
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Post.objects.filter(pk=post.pk).update(comment_count=5)
+        call_command('reconcile_stats', batch_size=1, stdout=StringIO())
+        stats = self.stats(self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(self.group_posts(self.group), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
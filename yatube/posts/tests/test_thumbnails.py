@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from ..constants import THUMBNAIL_WIDTHS
+from ..feed_cache import feed_generation
+from ..models import Post, User
+from ..thumbnails import (expected_thumbnails, extra_formats,
+                          generate_variants, responsive_thumbnail,
+                          schedule_on_commit)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.schedule_thumbnail')
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_original_until_ready(self, schedule_thumbnail):
+        """Пока миниатюры нет, отдаётся оригинал, а генерация в очереди."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+        schedule_thumbnail.assert_called_once()
+        generate_variants(self.post.image.name)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_ready_without_feed_flush(self, schedule_thumbnail):
+        """
+        Готовые миниатюры появляются в ленте и на странице поста
+        без смены поколения ленты.
+        """
+        for name in expected_thumbnails(self.post.image.name):
+            default.storage.delete(name)
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(reverse('posts:index'))
+        etag = self.client.get(detail)['ETag']
+        generation = feed_generation()
+        generate_variants(self.post.image.name)
+        self.assertEqual(feed_generation(), generation)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+        response = self.client.get(detail)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_warm_thumbnails(self, schedule_thumbnail):
+        """Команда warm_thumbnails заранее создаёт миниатюры."""
+        out = StringIO()
+        call_command('warm_thumbnails', workers=2, stdout=out)
+        self.assertIn('Готово миниатюр: 1', out.getvalue())
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+        schedule_thumbnail.assert_not_called()
+
+    def test_responsive_variants(self, schedule_thumbnail):
+        """
+        Карточка получает srcset из всех ширин, а описание вариантов
+        кэшируется и не требует обращений к KV-хранилищу sorl.
+        """
+        generate_variants(self.post.image.name)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        for width in THUMBNAIL_WIDTHS:
+            self.assertContains(response, f' {width}w')
+        if 'WEBP' in extra_formats():
+            self.assertContains(response, 'type="image/webp"')
+        with mock.patch.object(default.kvstore, 'get') as kvstore_get:
+            thumbnail = responsive_thumbnail(self.post.image)
+        kvstore_get.assert_not_called()
+        self.assertEqual(thumbnail.width, max(THUMBNAIL_WIDTHS))
+
+    def test_upload_always_scheduled(self, schedule_thumbnail):
+        """Даже небольшая картинка обрабатывается пулом, а не запросом."""
+        with mock.patch(
+            'posts.thumbnails.transaction.on_commit', lambda func: func()
+        ):
+            schedule_on_commit(self.post.image.name)
+        schedule_thumbnail.assert_called_once_with(self.post.image.name)
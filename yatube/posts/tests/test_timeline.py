@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Follow, Post, Timeline, User, UserStats
+from ..stats import user_stats
+from ..timeline import celebrity_ids, timeline_posts
+from .utils import ImmediateExecutor
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fan_out_on_create(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, timeline_posts(self.reader))
+
+    def test_follow_backfill_and_unfollow(self):
+        """Подписка добавляет старые посты, отписка их убирает."""
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(list(timeline_posts(self.reader)), [post])
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        self.assertFalse(timeline_posts(self.reader).exists())
+
+    @mock.patch('posts.timeline.TIMELINE_LENGTH', 2)
+    @mock.patch('posts.timeline.get_executor', ImmediateExecutor)
+    @mock.patch('posts.timeline.transaction.on_commit', lambda func: func())
+    def test_timeline_trimmed(self):
+        """Лента обрезается до заданной длины в фоне после раскладки."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).first().post.text,
+            'Пост 2',
+        )
+
+    @mock.patch('posts.timeline.CELEBRITY_FOLLOWERS', 1)
+    def test_celebrity_fan_out_on_read(self):
+        """Посты знаменитостей не раскладываются, а читаются напрямую."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, timeline_posts(self.reader))
+
+    @mock.patch('posts.timeline.CELEBRITY_FOLLOWERS', 2)
+    def test_former_celebrity_backfilled_in_background(self):
+        """
+        Посты бывшей знаменитости раскладываются по лентам
+        не в запросе отписки, а в фоне после фиксации транзакции.
+        """
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        executor = mock.Mock()
+        with mock.patch('posts.timeline.get_executor', lambda: executor):
+            with mock.patch(
+                'posts.timeline.transaction.on_commit',
+                lambda func: func(),
+            ):
+                Follow.objects.filter(user=other).delete()
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        function, *args = executor.submit.call_args[0]
+        function(*args)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    @mock.patch('posts.timeline.TIMELINE_LENGTH', 2)
+    def test_fan_out_defers_trim(self):
+        """Запрос с новым постом не обрезает ленты сам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        executor = mock.Mock()
+        with mock.patch('posts.timeline.get_executor', lambda: executor):
+            with mock.patch(
+                'posts.timeline.transaction.on_commit',
+                lambda func: func(),
+            ):
+                for number in range(3):
+                    Post.objects.create(
+                        author=self.author, text=f'Пост {number}'
+                    )
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 3
+        )
+        function, *args = executor.submit.call_args[0]
+        function(*args)
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 2
+        )
+
+    @mock.patch('posts.timeline.CELEBRITY_FOLLOWERS', 2)
+    def test_celebrity_status_from_stats(self):
+        """Статус знаменитости берётся из счётчика, а не COUNT подписок."""
+        user_stats(self.author)
+        UserStats.objects.filter(user=self.author).update(followers_count=1)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIn(self.author.pk, celebrity_ids())
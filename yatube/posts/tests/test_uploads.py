@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+from ..storage import image_storage
+from ..uploads import gif_frame_count, inspect_image
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(image_format, size=(4, 2), frames=1):
+    images = [
+        Image.new('RGB', size, (index * 40 % 256, 0, 0))
+        for index in range(frames)
+    ]
+    buffer = BytesIO()
+    options = {}
+    if frames > 1:
+        options = {'save_all': True, 'append_images': images[1:]}
+    images[0].save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def upload(content, name='image.gif'):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.schedule_thumbnail')
+class UploadValidationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, image):
+        return self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def assertImageError(self, response, code):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].errors.as_data()['image'][0].code,
+            code,
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_gif_frames_counted_from_headers(self, schedule_thumbnail):
+        """Кадры GIF считаются без декодирования, как у Pillow."""
+        content = image_bytes('GIF', frames=3)
+        self.assertEqual(gif_frame_count(BytesIO(content)), 3)
+        self.assertEqual(gif_frame_count(BytesIO(content), limit=1), 2)
+        self.assertEqual(
+            inspect_image(BytesIO(content)), ('GIF', 4, 2, 3)
+        )
+
+    @mock.patch('posts.uploads.POST_IMAGE_MAX_SIZE', 64)
+    @mock.patch('posts.forms.POST_IMAGE_MAX_SIZE', 64)
+    def test_oversized_upload_not_kept(self, schedule_thumbnail):
+        """
+        Файл больше лимита отбрасывается обработчиком загрузки:
+        форма получает пустую заглушку и сообщает об ошибке.
+        """
+        content = image_bytes('PNG', size=(64, 64)) * 4
+        with mock.patch(
+            'posts.forms.inspect_image', side_effect=AssertionError
+        ):
+            response = self.create_post(upload(content, 'big.png'))
+        self.assertImageError(response, 'too_large')
+
+    @mock.patch('posts.forms.POST_IMAGE_MAX_FRAMES', 2)
+    def test_too_many_frames(self, schedule_thumbnail):
+        response = self.create_post(upload(image_bytes('GIF', frames=3)))
+        self.assertImageError(response, 'frames')
+
+    @mock.patch('posts.forms.POST_IMAGE_MAX_PIXELS', 4)
+    def test_too_many_pixels(self, schedule_thumbnail):
+        response = self.create_post(upload(image_bytes('GIF')))
+        self.assertImageError(response, 'dimensions')
+
+    def test_unsupported_format(self, schedule_thumbnail):
+        response = self.create_post(upload(image_bytes('BMP'), 'image.bmp'))
+        self.assertImageError(response, 'format')
+
+    def test_valid_upload(self, schedule_thumbnail):
+        self.create_post(upload(image_bytes('GIF', frames=2)))
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    @mock.patch('posts.images.transaction.on_commit', lambda func: func())
+    def test_downsize_images(self, schedule_thumbnail):
+        """downsize_images уменьшает большие оригиналы и удаляет старые."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Большая картинка',
+            image=upload(image_bytes('PNG', size=(100, 50)), 'big.png'),
+        )
+        old_name = post.image.name
+        call_command('downsize_images', side=20, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(image_storage.exists(old_name))
+        with image_storage.open(post.image.name) as file:
+            self.assertEqual(inspect_image(file), ('PNG', 20, 10, 1))
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -9,13 +10,17 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from mixer.backend.django import mixer
 
-from ..constants import COUNT_POST_FOR_TEST, LIMIT_POST, LIMIT_POST_FOR_TEST
-from ..models import Follow, Group, Post, User
+from ..constants import (COUNT_POST_FOR_TEST, LIMIT_COMMENTS, LIMIT_POST,
+                         LIMIT_POST_FOR_TEST)
+from ..models import Comment, Follow, Group, Post, User
+from ..thumbnails import generate_variants
+from .utils import sync_thumbnails
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@sync_thumbnails
 class TaskPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -140,6 +145,65 @@ class TaskPagesTests(TestCase):
                     LIMIT_POST_FOR_TEST
                 )
 
+    def test_cursor_paginator(self):
+        """
+        Проверка ключевой пагинации: страницы по ?cursor= идут без
+        пропусков и повторов, ссылка назад возвращает прошлую страницу.
+        """
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+        for reverse_url in self.urls_with_paginator:
+            with self.subTest(reverse_url):
+                response = self.authorized_client.get(reverse_url + '?cursor=')
+                first_page = response.context['page_obj']
+                self.assertFalse(first_page.has_previous())
+                response = self.authorized_client.get(
+                    reverse_url + f'?cursor={first_page.next_cursor}'
+                )
+                second_page = response.context['page_obj']
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    [post.pk for post in first_page]
+                    + [post.pk for post in second_page],
+                    expected,
+                )
+                response = self.authorized_client.get(
+                    reverse_url + f'?cursor={second_page.previous_cursor}'
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page)
+                )
+
+    def test_page_links_use_cursor(self):
+        """Ссылки со страниц ?page= ведут в ключевую пагинацию."""
+        for reverse_url in self.urls_with_paginator:
+            with self.subTest(reverse_url):
+                response = self.authorized_client.get(reverse_url)
+                first_page = response.context['page_obj']
+                self.assertContains(
+                    response, f'?cursor={first_page.next_cursor}'
+                )
+                self.assertNotContains(response, '?page=')
+                response = self.authorized_client.get(
+                    reverse_url + f'?cursor={first_page.next_cursor}'
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']), LIMIT_POST_FOR_TEST
+                )
+                response = self.authorized_client.get(
+                    reverse_url + '?page=2'
+                )
+                second_page = response.context['page_obj']
+                response = self.authorized_client.get(
+                    reverse_url + f'?cursor={second_page.previous_cursor}'
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page)
+                )
+
     def test_context_index(self):
         """Проверка контекстов страницы index."""
         response = self.authorized_client.get(reverse('posts:index'))
@@ -175,6 +239,46 @@ class TaskPagesTests(TestCase):
         self.context_for_test(object)
         self.assertEqual(object.id, self.posts_test[0].id)
 
+    def test_comment_pages(self):
+        """
+        Комментарии поста идут страницами по (created, id) без пропусков
+        и повторов даже при одинаковом времени, следующая страница
+        отдаётся HTML-фрагментом и JSON.
+        """
+        post = self.posts_test[0]
+        mixer.cycle(LIMIT_COMMENTS + 3).blend(
+            Comment, post=post, author=self.user
+        )
+        Comment.objects.update(created=post.pub_date)
+        expected = list(
+            post.comments.order_by('-pk').values_list('pk', flat=True)
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        first_page = response.context['comments']
+        self.assertTrue(first_page.has_next())
+        self.assertEqual(
+            [comment.pk for comment in first_page], expected[:LIMIT_COMMENTS]
+        )
+        url = reverse('posts:post_comments', kwargs={'post_id': post.id})
+        response = self.client.get(url, {'cursor': first_page.next_cursor})
+        second_page = response.context['comments']
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            [comment.pk for comment in second_page], expected[LIMIT_COMMENTS:]
+        )
+        response = self.client.get(
+            url, {'cursor': first_page.next_cursor, 'format': 'json'}
+        )
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            expected[LIMIT_COMMENTS:],
+        )
+
     def test_new_post_in_need_pages(self):
         """Проверка новый пост попал на нужные страницы и на первой позиции."""
         new_post = Post.objects.create(
@@ -240,14 +344,19 @@ class TaskPagesTests(TestCase):
         )
         self.assertTrue(response.context['is_edit'])
 
-    def test_cache(self):
-        """Проверка кэша страницы Index."""
+    @mock.patch('posts.thumbnails.schedule_thumbnail')
+    def test_cache(self, schedule_thumbnail):
+        """
+        Проверка кэша страницы Index: без изменений постов страница
+        берётся из кэша, новый пост сразу сбрасывает кэш.
+        Миниатюры готовы заранее: карточку с оригиналом кэш пропускает.
+        """
+        generate_variants(self.post_with_image.image.name)
         response = self.authorized_client.get(
             reverse('posts:index')
         )
-        Post.objects.create(
-            text='Проверяем кэширование страницы',
-            author=self.user,
+        Post.objects.filter(pk=self.post_with_image.pk).update(
+            text='Изменение без сигналов не сбрасывает кэш'
         )
         cached = self.authorized_client.get(
             reverse('posts:index')
@@ -256,11 +365,33 @@ class TaskPagesTests(TestCase):
             response.content,
             cached.content
         )
-        cache.clear()
+        Post.objects.create(
+            text='Проверяем кэширование страницы',
+            author=self.user,
+        )
         response_new = self.authorized_client.get(
             reverse('posts:index')
         )
         self.assertNotEqual(cached.content, response_new.content)
+        self.assertContains(response_new, 'Проверяем кэширование страницы')
+
+    def test_card_cache(self):
+        """
+        Карточка поста кэшируется по версии updated_at
+        и обновляется после сохранения поста.
+        """
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        post = Post.objects.get(pk=self.posts_test[0].pk)
+        # Карточку с ещё не готовыми миниатюрами кэш пропускает.
+        generate_variants(post.image.name)
+        self.authorized_client.get(url)
+        Post.objects.filter(pk=post.pk).update(text='Текст без новой версии')
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'Текст без новой версии')
+        post.text = 'Отредактированный текст'
+        post.save()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Отредактированный текст')
 
     def test_follow(self):
         """Проверка подписки."""
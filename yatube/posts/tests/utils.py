@@ -0,0 +1,21 @@
+from concurrent.futures import Future
+from unittest import mock
+
+
+class ImmediateExecutor:
+    """Пул миниатюр для тестов: задача выполняется в вызывающем потоке."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+# Миниатюры готовы до ответа на запрос: фоновые потоки не пишут
+# во временный MEDIA_ROOT после того, как тест его удалил.
+sync_thumbnails = mock.patch(
+    'posts.thumbnails.get_executor', ImmediateExecutor
+)
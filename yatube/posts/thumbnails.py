@@ -0,0 +1,316 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import transaction
+from PIL import features
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+
+from .constants import (THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS,
+                        THUMBNAIL_SIZES, THUMBNAIL_VARIANTS_KEY,
+                        THUMBNAIL_VARIANTS_TIME, THUMBNAIL_WIDTHS,
+                        THUMBNAIL_WORKERS)
+from .storage import image_storage
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def source_file(file_):
+    """
+    Исходник из хранилища картинок постов. sorl учитывает хранилище
+    в ключе миниатюры, поэтому все пути строят исходник одинаково.
+    """
+    return ImageFile(getattr(file_, 'name', file_), image_storage)
+
+
+def thumbnail_options(source, options):
+    """Дополняет опции так же, как ThumbnailBackend.get_thumbnail."""
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', default.backend._get_format(source))
+    for key, value in default.backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in default.backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(source, geometry, options):
+    """ImageFile миниатюры с тем же именем, что выдал бы sorl."""
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def variant_geometries():
+    """Ширины THUMBNAIL_WIDTHS с пропорциями THUMBNAIL_GEOMETRY."""
+    width, height = (int(side) for side in THUMBNAIL_GEOMETRY.split('x'))
+    return [
+        (variant, f'{variant}x{round(height * variant / width)}')
+        for variant in THUMBNAIL_WIDTHS
+    ]
+
+
+def extra_formats():
+    """Дополнительные форматы: WebP, если Pillow собран с его поддержкой."""
+    return ['WEBP'] if features.check('webp') else []
+
+
+def thumbnail_variants(source):
+    """
+    Все варианты миниатюры исходника: кортежи
+    (формат, ширина, geometry, опции, ImageFile).
+    Первыми идут варианты основного формата из настроек sorl.
+    """
+    main = thumbnail_options(source, THUMBNAIL_OPTIONS)
+    option_sets = [main] + [
+        thumbnail_options(source, dict(THUMBNAIL_OPTIONS, format=extra))
+        for extra in extra_formats()
+        if extra != main['format']
+    ]
+    return [
+        (
+            options['format'],
+            width,
+            geometry,
+            options,
+            thumbnail_file(source, geometry, options),
+        )
+        for options in option_sets
+        for width, geometry in variant_geometries()
+    ]
+
+
+def generate_thumbnail(name, geometry=THUMBNAIL_GEOMETRY, **options):
+    """
+    Создаёт файл миниатюры. Не обращается к базе и KV-хранилищу sorl,
+    поэтому безопасно выполняется в фоновом потоке; запись в
+    KV-хранилище делает первый запрос, который увидит готовый файл.
+    """
+    source = source_file(name)
+    options = thumbnail_options(source, options or THUMBNAIL_OPTIONS)
+    thumbnail = thumbnail_file(source, geometry, options)
+    if thumbnail.exists():
+        return thumbnail
+    source_image = default.engine.get_image(source)
+    try:
+        options['image_info'] = default.engine.get_image_info(source_image)
+        default.backend._create_thumbnail(
+            source_image, geometry, options, thumbnail
+        )
+    finally:
+        default.engine.cleanup(source_image)
+    return thumbnail
+
+
+def generate_variants(name):
+    """
+    Создаёт недостающие варианты миниатюры. Исходник декодируется
+    один раз на все размеры и форматы; как и generate_thumbnail,
+    функция не трогает базу и KV-хранилище.
+    """
+    source = source_file(name)
+    variants = thumbnail_variants(source)
+    missing = [variant for variant in variants if not variant[-1].exists()]
+    if missing:
+        source_image = default.engine.get_image(source)
+        try:
+            image_info = default.engine.get_image_info(source_image)
+            for _, _, geometry, options, thumbnail in missing:
+                # Исходник могли удалить, пока создавались другие размеры.
+                if not source.exists():
+                    break
+                default.backend._create_thumbnail(
+                    source_image,
+                    geometry,
+                    dict(options, image_info=image_info),
+                    thumbnail,
+                )
+        finally:
+            default.engine.cleanup(source_image)
+    return [thumbnail for *_, thumbnail in variants]
+
+
+def expected_thumbnails(name):
+    """
+    Имена миниатюр, которые пул создаёт для картинки поста.
+    Считаются по имени исходника, без обращения к диску и базе.
+    """
+    return [
+        thumbnail.name
+        for *_, thumbnail in thumbnail_variants(source_file(name))
+    ]
+
+
+def variants_cache_key(source):
+    return THUMBNAIL_VARIANTS_KEY.format(key=source.key)
+
+
+def delete_thumbnails(name):
+    """
+    Удаляет исходник и миниатюры. Миниатюры из пула могут ещё
+    не быть в KV-хранилище sorl, поэтому их файлы удаляются по имени.
+    """
+    source = source_file(name)
+    for *_, thumbnail in thumbnail_variants(source):
+        thumbnail.delete()
+    delete(source, delete_file=True)
+    cache.delete(variants_cache_key(source))
+
+
+def _generate(name):
+    try:
+        # Кэш ленты сбрасывать не нужно: страницы хранят только id
+        # постов, а карточки с оригиналом вместо миниатюры не кэшируются.
+        generate_variants(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры %s', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def schedule_thumbnail(name):
+    """Ставит создание миниатюр картинки в очередь, если их там нет."""
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    get_executor().submit(_generate, name)
+
+
+def schedule_on_commit(name):
+    """
+    Ставит генерацию в очередь после фиксации транзакции с новым
+    постом. Запрос не ждёт миниатюр: даже небольшой файл может
+    оказаться огромным по числу пикселей или кадров.
+    """
+    transaction.on_commit(lambda: schedule_thumbnail(name))
+
+
+def register_thumbnail(source, thumbnail):
+    """Записывает готовый файл миниатюры в KV-хранилище sorl."""
+    default.kvstore.get_or_set(source)
+    default.kvstore.set(thumbnail, source)
+    return thumbnail
+
+
+def ready_thumbnail(file_, geometry=THUMBNAIL_GEOMETRY, **options):
+    """
+    Возвращает готовую миниатюру или None, никогда не создавая её
+    в текущем потоке. Если миниатюры нет, она ставится в очередь.
+    """
+    source = source_file(file_)
+    options = thumbnail_options(source, options or THUMBNAIL_OPTIONS)
+    thumbnail = thumbnail_file(source, geometry, options)
+    cached = default.kvstore.get(thumbnail)
+    if cached:
+        return cached
+    if thumbnail.exists():
+        return register_thumbnail(source, thumbnail)
+    schedule_thumbnail(source.name)
+    return None
+
+
+class ResponsiveImage:
+    """
+    Картинка для тега <picture>.
+    url, width, height - самая широкая миниатюра основного формата
+    srcset - все ширины основного формата
+    sources - пары (MIME-тип, srcset) дополнительных форматов.
+    """
+    sizes = THUMBNAIL_SIZES
+
+    def __init__(self, url, width=None, height=None, srcset='', sources=()):
+        self.url = url
+        self.width = width
+        self.height = height
+        self.srcset = srcset
+        self.sources = sources
+
+
+def collect_variants(source):
+    """
+    Описание всех готовых вариантов для кэша или None,
+    если хотя бы один вариант ещё не создан.
+    """
+    srcsets = {}
+    for image_format, width, _, _, thumbnail in thumbnail_variants(source):
+        cached = default.kvstore.get(thumbnail)
+        if cached is None:
+            if not thumbnail.exists():
+                return None
+            cached = register_thumbnail(source, thumbnail)
+        srcsets.setdefault(image_format, []).append((width, cached))
+    main_format, *extra_formats = srcsets
+    largest = srcsets[main_format][-1][1]
+
+    def srcset(image_format):
+        return ', '.join(
+            f'{thumbnail.url} {width}w'
+            for width, thumbnail in srcsets[image_format]
+        )
+
+    return {
+        'url': largest.url,
+        'width': largest.width,
+        'height': largest.height,
+        'srcset': srcset(main_format),
+        'sources': [
+            (MIME_TYPES[image_format], srcset(image_format))
+            for image_format in extra_formats
+        ],
+    }
+
+
+def responsive_thumbnail(file_):
+    """
+    Возвращает ResponsiveImage со всеми размерами и форматами или None,
+    пока варианты создаются в фоне. Описание вариантов кэшируется
+    целиком, поэтому KV-хранилище не опрашивается на каждый размер.
+    """
+    source = source_file(file_)
+    key = variants_cache_key(source)
+    variants = cache.get(key)
+    if variants is None:
+        variants = collect_variants(source)
+        if variants is None:
+            schedule_thumbnail(source.name)
+            return None
+        cache.set(key, variants, THUMBNAIL_VARIANTS_TIME)
+    return ResponsiveImage(**variants)
+
+
+def thumbnails_ready(file_):
+    """
+    Готовы ли все варианты миниатюры. Когда готовы, ответ берётся
+    из кэша их описания, поэтому годится для ETag страницы поста.
+    """
+    return responsive_thumbnail(file_) is not None
@@ -0,0 +1,206 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from core.db import write_lock
+
+from .constants import (CELEBRITY_CACHE_KEY, CELEBRITY_CACHE_TIME,
+                        CELEBRITY_FOLLOWERS, FAN_OUT_BATCH_SIZE,
+                        TIMELINE_LENGTH, TIMELINE_WORKERS)
+from .models import Follow, Post, Timeline
+from .stats import followers_count
+
+logger = logging.getLogger(__name__)
+
+# Лишние записи лент пачки пользователей одним DELETE: номера
+# записей в каждой ленте считает оконная функция за один проход
+# по индексу (user, -pub_date), удаляется всё после TIMELINE_LENGTH.
+TRIM_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM ('
+    'SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC'
+    ') AS position FROM {table} WHERE user_id IN ({users})'
+    ') WHERE position > %s)'
+)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=TIMELINE_WORKERS,
+                thread_name_prefix='timelines',
+            )
+    return _executor
+
+
+def celebrity_ids():
+    """
+    Множество id авторов, у которых подписчиков не меньше
+    CELEBRITY_FOLLOWERS. Их посты не раскладываются по лентам,
+    а подмешиваются при чтении.
+    """
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            Follow.objects.values('author')
+            .annotate(followers=Count('user'))
+            .filter(followers__gte=CELEBRITY_FOLLOWERS)
+            .values_list('author', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIME)
+    return ids
+
+
+def update_celebrity(author_id):
+    """
+    Пересчитывает статус автора после изменения подписок.
+    Если автор перестал быть знаменитостью, его свежие посты
+    раскладываются по лентам подписчиков в фоне после фиксации
+    транзакции: подписчиков может быть до CELEBRITY_FOLLOWERS.
+    """
+    ids = celebrity_ids()
+    is_celebrity = followers_count(author_id) >= CELEBRITY_FOLLOWERS
+    if is_celebrity == (author_id in ids):
+        return
+    if is_celebrity:
+        ids.add(author_id)
+    else:
+        ids.discard(author_id)
+    cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIME)
+    if not is_celebrity:
+        transaction.on_commit(
+            lambda: get_executor().submit(backfill_followers, author_id)
+        )
+
+
+def backfill_followers(author_id):
+    """Раскладывает посты бывшей знаменитости по лентам подписчиков."""
+    try:
+        followers = list(
+            Follow.objects.filter(
+                author_id=author_id
+            ).values_list('user_id', flat=True)
+        )
+        for user_id in followers:
+            with write_lock():
+                backfill_author(user_id, author_id)
+    except Exception:
+        logger.exception('Не удалось разложить посты автора %s', author_id)
+
+
+def trim_timelines(user_ids):
+    """
+    Оставляет в лентах пользователей TIMELINE_LENGTH последних записей.
+    Ленты не длиннее TIMELINE_LENGTH не меняются; на каждую пачку
+    из FAN_OUT_BATCH_SIZE пользователей уходит один запрос.
+    """
+    user_ids = list(user_ids)
+    table = connection.ops.quote_name(Timeline._meta.db_table)
+    with connection.cursor() as db:
+        for start in range(0, len(user_ids), FAN_OUT_BATCH_SIZE):
+            batch = user_ids[start:start + FAN_OUT_BATCH_SIZE]
+            db.execute(
+                TRIM_SQL.format(
+                    table=table, users=', '.join(['%s'] * len(batch))
+                ),
+                batch + [TIMELINE_LENGTH],
+            )
+
+
+def trim_followers(user_ids):
+    """Обрезает ленты подписчиков в фоне после раскладки поста."""
+    try:
+        with write_lock():
+            trim_timelines(user_ids)
+    except Exception:
+        logger.exception('Не удалось обрезать ленты подписчиков')
+
+
+def fan_out_post(post):
+    """
+    Раскладывает новый пост по лентам подписчиков автора.
+    Запрос только вставляет записи, а ленты, ставшие длиннее
+    TIMELINE_LENGTH, обрезаются в фоне после фиксации транзакции.
+    """
+    if post.author_id in celebrity_ids():
+        return
+    followers = list(
+        Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True)
+    )
+    for start in range(0, len(followers), FAN_OUT_BATCH_SIZE):
+        batch = followers[start:start + FAN_OUT_BATCH_SIZE]
+        Timeline.objects.bulk_create(
+            [
+                Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+    if followers:
+        transaction.on_commit(
+            lambda: get_executor().submit(trim_followers, followers)
+        )
+
+
+def backfill_author(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if author_id in celebrity_ids():
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')[:TIMELINE_LENGTH]
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild_timeline(user_id):
+    """Полностью пересобирает ленту пользователя по его подпискам."""
+    Timeline.objects.filter(user_id=user_id).delete()
+    authors = Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True)
+    for author_id in authors:
+        backfill_author(user_id, author_id)
+
+
+def timeline_posts(user):
+    """
+    Лента подписок: материализованные записи плюс посты
+    знаменитостей, на которых подписан пользователь (fan-out on read).
+    """
+    condition = Q(
+        pk__in=Timeline.objects.filter(user=user).values('post_id')
+    )
+    celebrities = celebrity_ids()
+    if celebrities:
+        condition |= Q(
+            author_id__in=Follow.objects.filter(
+                user=user, author_id__in=celebrities
+            ).values('author_id')
+        )
+    return Post.objects.filter(condition)
@@ -0,0 +1,120 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+
+from .constants import POST_IMAGE_MAX_FRAMES, POST_IMAGE_MAX_SIZE
+
+GIF_EXTENSION = 0x21
+GIF_IMAGE = 0x2C
+GIF_TRAILER = 0x3B
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Первый обработчик FILE_UPLOAD_HANDLERS. Считает байты файла и,
+    как только файл превысил POST_IMAGE_MAX_SIZE, перестаёт передавать
+    данные следующим обработчикам: остаток не попадает ни в память,
+    ни во временный файл. Форма получает пустую заглушку
+    с настоящим размером и показывает понятную ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > POST_IMAGE_MAX_SIZE:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received <= POST_IMAGE_MAX_SIZE:
+            return None
+        return InMemoryUploadedFile(
+            BytesIO(),
+            self.field_name,
+            self.file_name,
+            self.content_type,
+            self.received,
+            self.charset,
+            self.content_type_extra,
+        )
+
+
+def _skip_sub_blocks(file):
+    """Пропускает цепочку подблоков GIF до нулевого блока."""
+    while True:
+        size = file.read(1)
+        if not size:
+            raise ValueError('Неожиданный конец GIF')
+        if size[0] == 0:
+            return
+        file.seek(size[0], 1)
+
+
+def _skip_color_table(file, packed):
+    if packed & 0x80:
+        file.seek(3 * 2 ** ((packed & 0x07) + 1), 1)
+
+
+def gif_frame_count(file, limit=POST_IMAGE_MAX_FRAMES):
+    """
+    Считает кадры GIF по заголовкам блоков, перескакивая через
+    сжатые данные кадров. Останавливается, как только кадров
+    больше limit, поэтому файл не читается дальше нужного.
+    """
+    file.seek(10)
+    _skip_color_table(file, file.read(3)[0])
+    frames = 0
+    while frames <= limit:
+        block = file.read(1)
+        if not block or block[0] == GIF_TRAILER:
+            break
+        if block[0] == GIF_EXTENSION:
+            file.seek(1, 1)
+            _skip_sub_blocks(file)
+        elif block[0] == GIF_IMAGE:
+            frames += 1
+            descriptor = file.read(9)
+            _skip_color_table(file, descriptor[8])
+            file.seek(1, 1)
+            _skip_sub_blocks(file)
+        else:
+            raise ValueError('Неизвестный блок GIF')
+    return frames
+
+
+def inspect_image(file):
+    """
+    Формат, ширина, высота и число кадров картинки.
+    Читаются только заголовки: Image.open не декодирует пиксели.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    try:
+        width, height = image.size
+        if image.format == 'GIF':
+            frames = gif_frame_count(file)
+        else:
+            frames = getattr(image, 'n_frames', 1)
+        return image.format, width, height, frames
+    finally:
+        file.seek(0)
+
+
+def downsize_image(file, side):
+    """
+    Уменьшает картинку так, чтобы большая сторона была не больше side,
+    сохраняя формат и пропорции. Возвращает ContentFile для хранилища.
+    """
+    image = Image.open(file)
+    image_format = image.format
+    image.thumbnail((side, side))
+    buffer = BytesIO()
+    options = {'quality': 90} if image_format == 'JPEG' else {}
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
@@ -1,11 +1,195 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
-from .constants import LIMIT_POST
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .constants import (CURSOR_NEXT, CURSOR_PREVIOUS, LIMIT_COMMENTS,
+                        LIMIT_POST)
+
+# Поля, которые нужны карточке поста и пагинации ленты.
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'updated_at',
+    'image',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__title',
+    'group__slug',
+    'comment_count',
+)
+
+
+def feed_posts(posts):
+    """
+    Готовит queryset постов для лент index, group_posts, profile
+    и follow_index: автор и группа подтягиваются одним JOIN,
+    из таблиц читаются только поля, нужные карточке.
+    """
+    return posts.select_related('author', 'group').only(*FEED_FIELDS)
+
+
+def detail_post(queryset):
+    """Готовит queryset для post_detail: автор со счётчиками и группа."""
+    return queryset.select_related('author__stats', 'group')
+
+
+def post_comments(post):
+    """Комментарии поста вместе с авторами одним запросом."""
+    return post.comments.select_related('author')
+
+
+def comments_page(post, cursor=None):
+    """
+    Страница комментариев поста, новые сверху. Ключевая пагинация
+    по (created, id): любая страница - один запрос по индексу.
+    """
+    paginator = CursorPaginator(post_comments(post), LIMIT_COMMENTS, 'created')
+    return paginator.get_page(cursor)
+
+
+def encode_cursor(direction, obj, field='pub_date'):
+    """Упаковывает направление и ключ (field, id) объекта в токен."""
+    raw = f'{direction}|{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Распаковывает токен курсора.
+    Для пустого или испорченного токена возвращает первую страницу.
+    """
+    if not cursor:
+        return CURSOR_NEXT, None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return CURSOR_NEXT, None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or value is None:
+        return CURSOR_NEXT, None
+    return direction, (value, pk)
+
+
+class CursorPage(Page):
+    """Страница ключевой пагинации: только ссылки вперёд и назад."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return encode_cursor(
+            CURSOR_NEXT, self.object_list[-1], self.paginator.field
+        )
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return encode_cursor(
+            CURSOR_PREVIOUS, self.object_list[0], self.paginator.field
+        )
+
+
+def add_cursors(page):
+    """
+    Даёт странице постраничного режима курсоры соседних страниц:
+    старые ссылки ?page= открываются, но дальше лента листается
+    ключевой пагинацией, без COUNT и OFFSET.
+    """
+    page.next_cursor = page.previous_cursor = None
+    if page.has_next():
+        page.next_cursor = encode_cursor(CURSOR_NEXT, page[len(page) - 1])
+    if page.has_previous():
+        page.previous_cursor = encode_cursor(CURSOR_PREVIOUS, page[0])
+    return page
+
+
+class CursorPaginator:
+    """
+    Ключевая (seek) пагинация по (field, id), по умолчанию (pub_date, id).
+    Не выполняет COUNT и OFFSET, поэтому любая страница
+    стоит столько же, сколько первая.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, cursor):
+        direction, position = decode_cursor(cursor)
+        posts = self.object_list
+        field = self.field
+        if position is None:
+            posts = list(
+                posts.order_by(f'-{field}', '-pk')[:self.per_page + 1]
+            )
+            return CursorPage(
+                posts[:self.per_page],
+                self,
+                has_next=len(posts) > self.per_page,
+                has_previous=False,
+            )
+
+        value, pk = position
+        if direction == CURSOR_NEXT:
+            posts = list(
+                posts.filter(
+                    Q(**{f'{field}__lt': value})
+                    | Q(**{field: value, 'pk__lt': pk})
+                ).order_by(f'-{field}', '-pk')[:self.per_page + 1]
+            )
+            return CursorPage(
+                posts[:self.per_page],
+                self,
+                has_next=len(posts) > self.per_page,
+                has_previous=True,
+            )
+
+        posts = list(
+            posts.filter(
+                Q(**{f'{field}__gt': value})
+                | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')[:self.per_page + 1]
+        )
+        return CursorPage(
+            posts[:self.per_page][::-1],
+            self,
+            has_next=True,
+            has_previous=len(posts) > self.per_page,
+        )
 
 
 def paginator_post(request, temp):
-    """Создает пагинацию страницы, на вход принимает запрос и посты."""
+    """
+    Создает пагинацию страницы, на вход принимает запрос и посты.
+    При наличии параметра ?cursor= включается ключевая пагинация.
+    Ссылки вида ?page= продолжают работать, но ссылки со страниц
+    обоих режимов несут курсор.
+    """
+    if 'cursor' in request.GET:
+        paginator = CursorPaginator(temp, LIMIT_POST)
+        return paginator.get_page(request.GET.get('cursor'))
+
     paginator = Paginator(temp, LIMIT_POST)
     page_number = request.GET.get('page')
 
-    return paginator.get_page(page_number)
+    return add_cursors(paginator.get_page(page_number))
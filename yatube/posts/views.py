@@ -1,26 +1,53 @@
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.functional import SimpleLazyObject
 
-from .constants import CACHE_TIME
+from core.db import serialized_writes
+
+from .cards import NO_COMMENTS, page_version
+from .comment_cache import latest_comments
+from .conditional import add_validators, not_modified, page_etag
+from .feed_cache import feed_generation, feed_modified, feed_page
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .utils import paginator_post
+from .search import search as search_posts
+from .stats import user_stats
+from .thumbnails import thumbnails_ready
+from .timeline import timeline_posts
+from .utils import comments_page, detail_post, feed_posts, paginator_post
 
 
-@cache_page(CACHE_TIME)
 def index(request):
     """
     Передаёт в шаблон index.html десять последних объектов модели.
+    Список постов страницы берётся из кэша по поколению ленты,
+    карточки - из своего кэша по версиям, поэтому запросы к постам
+    выполняются только при промахе.
+    Повторный запрос с тем же ETag получает 304 без отрисовки.
     """
     template = 'posts/index.html'
-    posts = Post.objects.select_related('group', 'author')
-    page_obj = paginator_post(request, posts)
+    vary = (request.GET.get('page'), request.GET.get('cursor'))
+    posts = feed_posts(Post.objects.all())
+    page_obj = SimpleLazyObject(lambda: paginator_post(request, posts))
+    generation = feed_generation()
+    feed = feed_page(request, 'index_page', generation, vary, page_obj)
+    latest = latest_comments(feed.posts)
+    etag = page_etag(
+        request, generation, *vary, page_version(feed.posts, latest)
+    )
+    last_modified = feed_modified()
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
     context = {
         'page_obj': page_obj,
+        'feed': feed,
+        'latest': latest,
     }
 
-    return render(request, template, context)
+    response = render(request, template, context)
+    return add_validators(request, response, etag, last_modified)
 
 
 def group_posts(request, slug):
@@ -29,14 +56,28 @@ def group_posts(request, slug):
     """
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator_post(request, posts)
+    vary = (group.slug, request.GET.get('page'), request.GET.get('cursor'))
+    posts = feed_posts(group.posts.all())
+    page_obj = SimpleLazyObject(lambda: paginator_post(request, posts))
+    generation = feed_generation()
+    feed = feed_page(request, 'group_page', generation, vary, page_obj)
+    latest = latest_comments(feed.posts)
+    etag = page_etag(
+        request, generation, group.pk, group.title, group.description,
+        *vary, page_version(feed.posts, latest),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed': feed,
+        'latest': latest,
     }
 
-    return render(request, template, context)
+    response = render(request, template, context)
+    return add_validators(request, response, etag)
 
 
 def profile(request, username):
@@ -44,9 +85,10 @@ def profile(request, username):
     Передача данных в шаблон profile.html.
     """
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post = author.posts.all()
-    page_obj = paginator_post(request, post)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    stats = user_stats(author)
     following = (
         request.user.is_authenticated
         and Follow.objects.filter(
@@ -54,13 +96,30 @@ def profile(request, username):
             author=author
         ).exists()
     )
+    vary = (author.pk, request.GET.get('page'), request.GET.get('cursor'))
+    posts = feed_posts(author.posts.all())
+    page_obj = SimpleLazyObject(lambda: paginator_post(request, posts))
+    generation = feed_generation()
+    feed = feed_page(request, 'profile_page', generation, vary, page_obj)
+    latest = latest_comments(feed.posts)
+    etag = page_etag(
+        request, generation, author.username, stats.posts_count,
+        stats.followers_count, stats.following_count, following,
+        *vary, page_version(feed.posts, latest),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
     context = {
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        'feed': feed,
+        'latest': latest,
     }
 
-    return render(request, template, context)
+    response = render(request, template, context)
+    return add_validators(request, response, etag)
 
 
 def post_detail(request, post_id):
@@ -68,19 +127,87 @@ def post_detail(request, post_id):
     Передача данных в шаблон post_detail.html.
     """
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(detail_post(Post.objects), id=post_id)
+    stats = user_stats(post.author)
+    cursor = request.GET.get('comments')
+    # Удалённый и новый комментарий не меняют счётчик, поэтому
+    # в ETag идёт и последний комментарий - из того же снимка,
+    # что и в карточке поста.
+    latest = latest_comments([post]).get(post.pk, NO_COMMENTS)
+    newest = [
+        (comment['created'], comment['id'])
+        for comment in latest['comments'][:1]
+    ]
+    # Пока миниатюры создаются, страница показывает оригинал.
+    etag = page_etag(
+        request, post.pk, post.updated_at, post.comment_count, newest,
+        post.author.get_full_name(), stats.posts_count,
+        post.group and (post.group.title, post.group.slug),
+        bool(post.image) and thumbnails_ready(post.image), cursor,
+        forms=True,
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
     form = CommentForm()
-    comments = post.comments.all()
+    comments = comments_page(post, cursor)
     context = {
         'post': post,
         'form': form,
         'comments': comments,
     }
 
+    response = render(request, template, context)
+    return add_validators(request, response, etag)
+
+
+def post_comments(request, post_id):
+    """
+    Следующая страница комментариев поста по курсору ?cursor=.
+    Отдаёт HTML-фрагмент для подгрузки на странице поста,
+    а при ?format=json - комментарии и курсор в JSON.
+    """
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
+    comments = comments_page(post, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    """
+    Полнотекстовый поиск по постам и комментариям.
+    Передаёт в шаблон search.html страницу результатов.
+    """
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = search_posts(query, request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+
     return render(request, template, context)
 
 
 @login_required
+@serialized_writes
 def post_create(request):
     """
     Передача формы создания сообщения в шаблон create_post.html.
@@ -101,6 +228,7 @@ def post_create(request):
 
 
 @login_required
+@serialized_writes
 def post_edit(request, post_id):
     """
     Передача формы редактирования сообщения в шаблон create_post.html.
@@ -130,6 +258,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@serialized_writes
 def add_comment(request, post_id):
     """Передача формы комментарии."""
     post = get_object_or_404(Post, id=post_id)
@@ -146,7 +275,7 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Передача данных в follow.html."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = feed_posts(timeline_posts(request.user))
     page_obj = paginator_post(request, posts)
     context = {
         'page_obj': page_obj,
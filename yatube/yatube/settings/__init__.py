@@ -0,0 +1,16 @@
+"""
+Настройки по окружениям: base - общие, dev - разработка,
+prod - боевое окружение, test - прогон тестов.
+Профиль выбирается переменной YATUBE_ENV (по умолчанию dev)
+или напрямую: DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+ENVIRONMENT = os.environ.get('YATUBE_ENV', 'dev')
+
+if ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif ENVIRONMENT == 'test':
+    from .test import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
@@ -0,0 +1,208 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+SECRET_KEY = 'vgw1%9$ll==$s5gc!ql^eyc@#et7_(sqef24(t)j20de2^alfm'
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'core.backends.TimedDjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+# Компилировать все шаблоны TEMPLATES_DIR при старте WSGI-приложения.
+TEMPLATE_WARMUP = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# Реплики только для чтения. Для проверки на двух файлах SQLite:
+# YATUBE_REPLICAS=/tmp/replica.sqlite3 и manage.py sync_replicas.
+REPLICA_FILES = filter(None, os.environ.get('YATUBE_REPLICAS', '').split(','))
+for number, name in enumerate(REPLICA_FILES, start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Представления, которые только читают и могут читать с реплик.
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:post_comments',
+)
+# Сколько секунд после записи пользователь читает только основную базу.
+REPLICA_PIN_TIME = 10
+
+# Применяются к каждому новому соединению SQLite (core.db).
+# WAL не даёт записи блокировать чтение, busy_timeout заставляет
+# писателя подождать, а не сразу падать с "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+# Очередь записи для представлений с core.db.serialized_writes.
+SQLITE_WRITE_QUEUE = False
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+
+LANGUAGE_CODE = 'ru-RU'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Файл больше лимита posts.constants.POST_IMAGE_MAX_SIZE не сохраняется
+# ни в памяти, ни во временном файле.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Общий кэш всех процессов: memcached, если в YATUBE_MEMCACHED заданы
+# адреса серверов через запятую, иначе файл SQLite, который делят
+# воркеры одной машины. Префикс ключей у каждого окружения свой.
+MEMCACHED_SERVERS = list(
+    filter(None, os.environ.get('YATUBE_MEMCACHED', '').split(','))
+)
+
+
+def shared_cache(environment, location=None):
+    if MEMCACHED_SERVERS and location is None:
+        cache = {
+            'BACKEND': 'core.cache.MemcachedCache',
+            'LOCATION': MEMCACHED_SERVERS,
+            'OPTIONS': {
+                'binary': True,
+                'behaviors': {'tcp_nodelay': True, 'ketama': True},
+            },
+        }
+    else:
+        cache = {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': location or os.path.join(
+                BASE_DIR, f'cache.{environment}.sqlite3'
+            ),
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    cache['KEY_PREFIX'] = f'yatube:{environment}'
+    return cache
+
+
+CACHES = {
+    'default': shared_cache('base'),
+}
+
+# Бюджет SQL-запросов на страницу для авторизованного пользователя.
+# Превышение пишется в лог, а при QUERY_BUDGETS_STRICT (в тестах) - ошибка.
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_posts': 6,
+    'posts:profile': 7,
+    'posts:follow_index': 6,
+    'posts:post_detail': 5,
+    'posts:post_comments': 4,
+}
+QUERY_BUDGETS_STRICT = False
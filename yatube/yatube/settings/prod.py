@@ -0,0 +1,32 @@
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import ALLOWED_HOSTS, TEMPLATES, shared_cache
+
+DEBUG = False
+
+# Ключ из base.py лежит в репозитории и в бою не годится.
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте YATUBE_SECRET_KEY для профиля prod')
+ALLOWED_HOSTS = ALLOWED_HOSTS + list(
+    filter(None, os.environ.get('YATUBE_ALLOWED_HOSTS', '').split(','))
+)
+
+# Шаблон читается и разбирается один раз на процесс, а не на запрос.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+CACHES = {
+    'default': shared_cache('prod'),
+}
@@ -0,0 +1,16 @@
+from .base import *  # noqa: F401,F403
+from .base import shared_cache
+
+# Стойкий хэш пароля в тестах только тратит время на create_user.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Та же реализация кэша, что в разработке, но в памяти процесса.
+CACHES = {
+    'default': shared_cache(
+        'test', 'file:yatube-test-cache?mode=memory&cache=shared'
+    ),
+}